@@ -0,0 +1,270 @@
+"""Benchmark suite untuk hot path render dan encode videogen_beta
+
+Jalan offline: hanya memakai font di repo, data_berita.txt dan cerita
+sintetis yang di-generate secara deterministik.
+
+    python benchmark_videogen.py                     # jalankan + bandingkan dengan baseline
+    python benchmark_videogen.py --update-baseline   # simpan hasil sebagai baseline baru
+    python benchmark_videogen.py --cases layout frame_render --stories short
+    python benchmark_videogen.py --require-baseline  # gagal jika baseline belum ada (default di CI)
+
+Setiap (case, story) dijalankan di subprocess sendiri supaya peak RSS
+yang tercatat memang milik case tersebut.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(REPO_DIR, "benchmark_baseline.json")
+
+CASES = ["layout", "frame_render", "held_render", "full_render", "encode_e2e"]
+STORIES = ["data_berita", "short", "long", "highlight_heavy"]
+
+# Metric yang lebih besar = lebih baik; sisanya lebih kecil = lebih baik
+HIGHER_IS_BETTER = {"frames_per_sec", "ops_per_sec"}
+
+_WORDS = ("mobil listrik baterai pemerintah kebijakan harga pasar warga kota "
+          "jalan tol proyek investasi energi teknologi sekolah kesehatan data "
+          "laporan tahun bulan minggu target produksi ekspor impor industri").split()
+
+
+def synthetic_story(kind: str) -> str:
+    """Cerita sintetis deterministik (seed tetap)"""
+    rng = random.Random(f"videogen-{kind}")
+
+    def sentence(words: int, highlight_every: int = 0) -> str:
+        tokens = []
+        for i in range(words):
+            word = rng.choice(_WORDS)
+            if highlight_every and i % highlight_every == 0:
+                style = rng.choice(["", "important:", "success:", "warning:"])
+                word = f"[[{style}{word} {rng.choice(_WORDS)}]]"
+            tokens.append(word)
+        return " ".join(tokens).capitalize() + "."
+
+    if kind == "short":
+        return sentence(12, highlight_every=6)
+    if kind == "long":
+        paragraphs = [" ".join(sentence(14, highlight_every=10) for _ in range(3)) for _ in range(12)]
+        return "\n\n".join(paragraphs)
+    if kind == "highlight_heavy":
+        paragraphs = [" ".join(sentence(12, highlight_every=2) for _ in range(3)) for _ in range(4)]
+        return "\n\n".join(paragraphs)
+    raise ValueError(f"unknown synthetic story '{kind}'")
+
+
+def load_story(name: str) -> str:
+    if name == "data_berita":
+        with open(os.path.join(REPO_DIR, "data_berita.txt"), "r", encoding="utf-8") as f:
+            return f.read().strip()
+    return synthetic_story(name)
+
+
+def _median_time(func, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def run_case(case: str, story_name: str, repeats: int) -> Dict:
+    """Jalankan satu case di process ini dan return metrics"""
+    os.chdir(REPO_DIR)
+    sys.path.insert(0, REPO_DIR)
+    import videogen_beta as vg
+
+    story = load_story(story_name)
+    generator = vg.VideoGenerator(headless=True)
+    processor = generator.get_highlight_processor(font_type='content')
+    segments = generator.split_content(story)
+    metrics = {"segments": len(segments)}
+
+    if case == "layout":
+        def layout_pass():
+            for segment in segments:
+                processor.parse_highlights(segment)
+                processor.smart_wrap_with_highlights(segment)
+        wall = _median_time(layout_pass, repeats)
+        metrics.update(wall_sec=wall, ops_per_sec=len(segments) / wall if wall else 0.0)
+
+    elif case == "frame_render":
+        # Per-frame API: render_frame_with_highlights untuk semua frame segment
+        frames = 0
+        wall = 0.0
+        for segment in segments:
+            lines = processor.smart_wrap_with_highlights(segment)
+            highlight_segments = processor.calculate_highlight_segments(lines, 400)
+            text_layer = processor.render_text_layer(lines, 400) if processor.cache_text_layer else None
+            total_frames = int(30 * generator.calculate_smart_duration(segment))
+            start = time.perf_counter()
+            for frame_idx in range(total_frames):
+                processor.render_frame_with_highlights(lines, 400, frame_idx, total_frames,
+                                                       highlight_segments, text_layer=text_layer)
+            wall += time.perf_counter() - start
+            frames += total_frames
+        metrics.update(wall_sec=wall, frames=frames, frames_per_sec=frames / wall if wall else 0.0)
+
+    elif case == "held_render":
+        # Frame source segment penuh: static run di-render sekali lalu di-hold (iter_spans)
+        frames = 0
+        rendered = 0
+
+        def held_pass():
+            nonlocal frames, rendered
+            frames = rendered = 0
+            for segment in segments:
+                source = generator.create_segment_source(segment, generator.calculate_smart_duration(segment))
+                for _, repeat in source.iter_spans():
+                    frames += repeat
+                rendered += source.frames_rendered
+        wall = _median_time(held_pass, repeats)
+        metrics.update(wall_sec=wall, frames=frames, frames_rendered=rendered,
+                       frames_per_sec=frames / wall if wall else 0.0)
+
+    elif case == "full_render":
+        frames = 0
+
+        def full_pass():
+            nonlocal frames
+            frames = 0
+            for segment in segments:
+                duration = generator.calculate_smart_duration(segment)
+                frames += len(processor.render_text_with_highlights(segment, duration, 400, 30))
+        wall = _median_time(full_pass, repeats)
+        metrics.update(wall_sec=wall, frames=frames, frames_per_sec=frames / wall if wall else 0.0)
+
+    elif case == "encode_e2e":
+        with tempfile.TemporaryDirectory() as work_dir:
+            input_file = os.path.join(work_dir, f"{story_name}.txt")
+            with open(input_file, "w", encoding="utf-8") as f:
+                f.write(story)
+            generator.output_dir = work_dir
+            generator.log_progress = lambda message: None
+
+            start = time.perf_counter()
+            success = generator.process_text_file(input_file)
+            wall = time.perf_counter() - start
+
+            output_file = os.path.join(work_dir, f"{story_name}_enhanced.mp4")
+            frames = generator.render_stats['frames_total']
+            metrics.update(
+                success=success,
+                wall_sec=wall,
+                frames=frames,
+                frames_per_sec=frames / wall if wall else 0.0,
+                frames_skipped=generator.render_stats['frames_skipped'],
+                bytes_written=os.path.getsize(output_file) if os.path.exists(output_file) else 0
+            )
+    else:
+        raise ValueError(f"unknown case '{case}'")
+
+    # None di Windows (tanpa modul resource)
+    metrics["peak_rss_mb"] = vg.peak_rss_mb()
+    return metrics
+
+
+def run_isolated(case: str, story_name: str, repeats: int) -> Dict:
+    """Jalankan case di subprocess baru (peak RSS terisolasi)"""
+    cmd = [sys.executable, os.path.abspath(__file__), "--run-one", case, story_name,
+           "--repeats", str(repeats)]
+    output = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Daftar regresi: metric yang lebih buruk dari baseline melebihi threshold"""
+    regressions = []
+    for key, metrics in results.items():
+        reference = baseline.get(key)
+        if not reference:
+            continue
+        for metric in ("wall_sec", "frames_per_sec", "ops_per_sec", "peak_rss_mb"):
+            if metrics.get(metric) is None or not reference.get(metric):
+                continue
+            old, new = reference[metric], metrics[metric]
+            change = (new - old) / old
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            if worse > threshold:
+                regressions.append(f"{key} {metric}: {old:.3f} -> {new:.3f} ({change * 100:+.1f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="videogen_beta render/encode benchmarks")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=CASES)
+    parser.add_argument("--stories", nargs="+", choices=STORIES, default=STORIES)
+    parser.add_argument("--repeats", type=int, default=3, help="Ulangan per case (median)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="File JSON baseline")
+    parser.add_argument("--update-baseline", action="store_true", help="Tulis hasil sebagai baseline")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="Toleransi regresi relatif (default 0.15 = 15%%)")
+    parser.add_argument("--output", help="Simpan hasil run ini ke file JSON")
+    parser.add_argument("--require-baseline", action="store_true", default=bool(os.environ.get("CI")),
+                        help="Gagal jika file baseline belum ada (default aktif jika env CI di-set)")
+    parser.add_argument("--run-one", nargs=2, metavar=("CASE", "STORY"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        print(json.dumps(run_case(args.run_one[0], args.run_one[1], args.repeats)))
+        return
+
+    results = {}
+    for case in args.cases:
+        for story_name in args.stories:
+            # encode_e2e cukup satu repeat - jauh lebih lama dari case lain
+            repeats = 1 if case == "encode_e2e" else args.repeats
+            key = f"{case}/{story_name}"
+            metrics = run_isolated(case, story_name, repeats)
+            results[key] = metrics
+
+            rate = metrics.get("frames_per_sec", metrics.get("ops_per_sec", 0.0))
+            rss = metrics["peak_rss_mb"]
+            print(f"⏱️ {key:<30} {metrics['wall_sec']:8.3f}s  {rate:9.1f}/s  " +
+                  (f"{rss:7.1f} MB" if rss is not None else "    n/a MB"))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"💾 Baseline updated: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        if args.require_baseline:
+            print(f"❌ Baseline not found: {args.baseline} - record one with --update-baseline")
+            sys.exit(1)
+        print("ℹ️ No baseline yet - run with --update-baseline to record one")
+        return
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print("❌ Regressions vs baseline:")
+        for regression in regressions:
+            print(f"   {regression}")
+        sys.exit(1)
+    print("✅ No regressions vs baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,596 @@
+"""Render queue service lokal untuk videogen_beta
+
+Service long-running: job masuk lewat HTTP API atau drop folder, diantre
+berdasarkan prioritas (breaking news duluan) dan dijalankan oleh worker
+process persisten yang menyimpan font, processor dan scene tetap hangat.
+Cold start dibayar sekali per worker, bukan sekali per cerita.
+
+    python render_service.py -o output/ --watch drop/ --workers 2
+
+HTTP API (JSON, default http://127.0.0.1:8765):
+
+    POST   /jobs                {"input": "berita.txt", "priority": "breaking"}
+                                {"text": "...", "name": "berita", "priority": 0}
+    GET    /jobs                daftar semua job
+    GET    /jobs/<id>           status, log terakhir, output_file (+ output_files per rendition)
+    GET    /jobs/<id>/output    file video hasil render
+    DELETE /jobs/<id>           cancel (queued maupun running)
+    GET    /health              status worker dan antrean
+
+Drop folder: file .txt baru di --watch otomatis di-submit; nama yang
+diawali "breaking" mendapat prioritas breaking.
+"""
+
+import argparse
+import heapq
+import itertools
+import json
+import multiprocessing
+import os
+import re
+import signal
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+import videogen_beta as vg
+
+# Angka lebih kecil = dijalankan lebih dulu
+PRIORITIES = {
+    'breaking': 0,
+    'high': 1,
+    'normal': 5,
+    'low': 9
+}
+
+
+def parse_priority(value) -> int:
+    """Nama prioritas ('breaking', 'normal', ...) atau angka 0-9"""
+    if value is None:
+        return PRIORITIES['normal']
+    # bool adalah subclass int - true/false dari JSON bukan prioritas
+    if isinstance(value, bool):
+        raise ValueError(f"invalid priority {value!r}")
+    if isinstance(value, str) and value.strip().lstrip('+-').isdigit():
+        value = int(value)
+    if isinstance(value, int):
+        if not min(PRIORITIES.values()) <= value <= max(PRIORITIES.values()):
+            raise ValueError(f"priority must be between {min(PRIORITIES.values())} "
+                             f"and {max(PRIORITIES.values())}, got {value}")
+        return value
+    if value not in PRIORITIES:
+        raise ValueError(f"unknown priority '{value}'")
+    return PRIORITIES[value]
+
+
+class RenderJob:
+    """Satu job render beserta status dan log terakhirnya"""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+
+    def __init__(self, input_file: str, output_dir: str, priority: int, source: str = 'api'):
+        self.id = uuid.uuid4().hex[:12]
+        self.input_file = input_file
+        self.output_dir = output_dir
+        self.priority = priority
+        self.source = source
+        self.status = self.QUEUED
+        self.output_file = None
+        self.output_files = []
+        self.error = None
+        self.worker = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.cancel_requested = False
+        self.logs = deque(maxlen=50)
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (self.DONE, self.FAILED, self.CANCELLED)
+
+    def to_dict(self) -> Dict:
+        return {
+            'id': self.id,
+            'input_file': self.input_file,
+            'output_dir': self.output_dir,
+            'priority': self.priority,
+            'source': self.source,
+            'status': self.status,
+            'output_file': self.output_file,
+            'output_files': self.output_files,
+            'error': self.error,
+            'worker': self.worker,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+            'elapsed': (self.finished or time.time()) - self.started if self.started else None,
+            'logs': list(self.logs)
+        }
+
+
+def _service_worker_main(options: Dict, conn) -> None:
+    """Worker process persisten: warm up sekali, lalu render job dari pipe sampai None"""
+    # Process group sendiri: cancel/stop bisa membunuh worker beserta ffmpeg-nya
+    if hasattr(os, 'setpgrp'):
+        os.setpgrp()
+    generator = vg.VideoGenerator(headless=True)
+    generator.apply_job_options(options)
+
+    # Warm up: font, processor content, glyph atlas dan layer scene dimuat sebelum job pertama
+    font_family = list(generator.fonts.keys())[0]
+    vg.FONT_REGISTRY.warm([(font_family, size) for size in vg.FONT_SIZES.values()])
+    processor = generator.get_highlight_processor(font_type='content')
+    if processor.text_backend == 'atlas':
+        vg.GLYPH_ATLAS.warm(processor.font)
+    generator.scene_background()
+    conn.send(('ready', os.getpid()))
+
+    generator.log_progress = lambda message: conn.send(('log', message))
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+
+        generator.output_dir = job['output_dir']
+        generator.render_stats = {'frames_total': 0, 'frames_skipped': 0}
+        os.makedirs(job['output_dir'], exist_ok=True)
+        success = generator.process_text_file(job['input_file'])
+
+        base_name = os.path.splitext(os.path.basename(job['input_file']))[0]
+        output_files = generator.rendition_files(os.path.join(job['output_dir'], f"{base_name}_enhanced.mp4"))
+        conn.send(('result', {
+            'success': success,
+            'output_file': output_files[0],
+            'output_files': output_files,
+            'frames_total': generator.render_stats['frames_total'],
+            'frames_skipped': generator.render_stats['frames_skipped']
+        }))
+    conn.close()
+
+
+class WarmWorker:
+    """Satu worker process persisten + thread yang mengambil job dari antrean"""
+
+    # Percobaan spawn sebelum job di depan antrean di-fail (backoff 2s, 4s, ...)
+    SPAWN_ATTEMPTS = 3
+
+    def __init__(self, service: 'RenderService', name: str):
+        self.service = service
+        self.name = name
+        self.process = None
+        self.conn = None
+        self.current_job = None
+        self.jobs_done = 0
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def _spawn(self) -> bool:
+        """Start process baru dan tunggu sampai warm up selesai; False jika process mati duluan"""
+        context = multiprocessing.get_context("spawn")
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_service_worker_main,
+                                       args=(self.service.options, child_conn))
+        start = time.time()
+        self.process.start()
+        child_conn.close()
+        try:
+            kind, pid = self.conn.recv()
+        except (EOFError, OSError):
+            # Import gagal / crash saat warm up: tandai mati, caller yang memutuskan retry
+            self.process.join(timeout=5)
+            exit_code = self.process.exitcode
+            self._kill()
+            self.service.log(f"💥 {self.name} failed to start (exit code {exit_code})")
+            return False
+        self.service.log(f"🔥 {self.name} warm (pid {pid}) in {time.time() - start:.1f}s")
+        return True
+
+    def _ensure_process(self) -> bool:
+        """Pastikan ada process hidup; spawn ulang dengan backoff, False jika tetap gagal"""
+        if self.process is not None and self.process.is_alive():
+            return True
+        for attempt in range(self.SPAWN_ATTEMPTS):
+            if attempt:
+                time.sleep(2 ** attempt)
+            if self.service.is_stopping():
+                return False
+            if self._spawn():
+                return True
+        return False
+
+    def _kill(self):
+        if self.process is not None:
+            vg._terminate_process_group(self.process)
+            self.conn.close()
+        self.process = None
+        self.conn = None
+
+    def _abort(self, job: RenderJob):
+        """Kill worker di tengah job dan hapus output setengah jadi job tersebut"""
+        self._kill()
+        self.service.remove_partial_outputs(job)
+
+    def stop(self):
+        if self.process is not None and self.process.is_alive() and self.current_job is None:
+            try:
+                self.conn.send(None)
+                self.process.join(timeout=5)
+            except (BrokenPipeError, OSError):
+                pass
+        self._kill()
+
+    def to_dict(self) -> Dict:
+        return {
+            'name': self.name,
+            'pid': self.process.pid if self.process is not None else None,
+            'alive': self.process is not None and self.process.is_alive(),
+            'current_job': self.current_job.id if self.current_job else None,
+            'jobs_done': self.jobs_done
+        }
+
+    def _run(self):
+        # Warm up langsung saat service start, bukan saat job pertama datang
+        self._ensure_process()
+        while True:
+            job = self.service.next_job()
+            if job is None:
+                return
+            self.current_job = job
+            try:
+                if not self._ensure_process():
+                    self.service.finish(job, RenderJob.FAILED, error=f"{self.name} failed to start")
+                    continue
+                self._execute(job)
+            except Exception as e:
+                # Pipe putus dll: job jangan tertinggal 'running', worker di-spawn ulang di job berikutnya
+                self._abort(job)
+                self.service.finish(job, RenderJob.FAILED, error=f"{self.name} error: {e}")
+            finally:
+                self.current_job = None
+                self.jobs_done += 1
+
+    def _execute(self, job: RenderJob):
+        job.worker = self.name
+        self.conn.send({'input_file': job.input_file, 'output_dir': job.output_dir})
+        result = None
+
+        while result is None:
+            if job.cancel_requested:
+                # Job yang sedang jalan tidak bisa di-interrupt dengan halus: restart worker
+                self._abort(job)
+                self.service.finish(job, RenderJob.CANCELLED)
+                return
+            if self.conn.poll(0.2):
+                try:
+                    kind, payload = self.conn.recv()
+                except EOFError:
+                    break
+                if kind == 'log':
+                    job.logs.append(payload)
+                elif kind == 'result':
+                    result = payload
+            elif not self.process.is_alive():
+                break
+
+        if result is None:
+            exit_code = self.process.exitcode if self.process is not None else None
+            self._abort(job)
+            self.service.finish(job, RenderJob.FAILED, error=f"worker exited with code {exit_code}")
+        elif result['success']:
+            self.service.finish(job, RenderJob.DONE, output_file=result['output_file'],
+                                output_files=result['output_files'])
+        else:
+            self.service.finish(job, RenderJob.FAILED, error="render failed")
+
+
+class RenderService:
+    """Priority queue + pool worker hangat + drop folder watcher"""
+
+    def __init__(self, output_dir: str, workers: int = 1, options: Optional[Dict] = None,
+                 spool_dir: Optional[str] = None):
+        self.output_dir = output_dir
+        self.options = options or vg.VideoGenerator(headless=True).get_job_options()
+        self.spool_dir = spool_dir or os.path.join(output_dir, ".spool")
+
+        self.jobs = {}
+        self._heap = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._lock = threading.Lock()
+
+        self.workers = [WarmWorker(self, f"worker-{i + 1}") for i in range(max(1, workers))]
+
+    def log(self, message: str):
+        print(message, flush=True)
+
+    def remove_partial_outputs(self, job: RenderJob):
+        """Bersihkan .partial dan work dir segment job yang di-cancel / worker-nya mati"""
+        generator = vg.VideoGenerator(headless=True)
+        generator.apply_job_options(self.options)
+        base_name = os.path.splitext(os.path.basename(job.input_file))[0]
+        generator.remove_partial_outputs(os.path.join(job.output_dir, f"{base_name}_enhanced.mp4"))
+
+    def start(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        for worker in self.workers:
+            worker.start()
+        self.log(f"🚀 Render service started with {len(self.workers)} worker(s)")
+
+    def is_stopping(self) -> bool:
+        return self._stopping
+
+    def stop(self):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        for worker in self.workers:
+            worker.stop()
+
+    def submit(self, input_file: Optional[str] = None, text: Optional[str] = None,
+               name: Optional[str] = None, priority=None, output_dir: Optional[str] = None,
+               source: str = 'api') -> RenderJob:
+        """Masukkan job ke antrean; text inline ditulis dulu ke spool folder"""
+        priority = parse_priority(priority)
+        if input_file is None and text is None:
+            raise ValueError("either 'input' or 'text' is required")
+
+        job = RenderJob(input_file, output_dir or self.output_dir, priority, source)
+        if text is not None:
+            os.makedirs(self.spool_dir, exist_ok=True)
+            # Job id di nama file: dua job dengan name sama tidak saling menimpa
+            spool_name = re.sub(r'[^\w.-]+', '_', name) + f"_{job.id}" if name else job.id
+            job.input_file = os.path.join(self.spool_dir, f"{spool_name}.txt")
+            with open(job.input_file, 'w', encoding='utf-8') as f:
+                f.write(text)
+        elif not os.path.isfile(input_file):
+            raise ValueError(f"input file not found: {input_file}")
+        job.input_file = os.path.abspath(job.input_file)
+
+        with self._condition:
+            self.jobs[job.id] = job
+            heapq.heappush(self._heap, (job.priority, next(self._counter), job.id))
+            self._condition.notify()
+        self.log(f"📥 Queued {job.id} {os.path.basename(job.input_file)} (priority {job.priority}, {source})")
+        return job
+
+    def next_job(self) -> Optional[RenderJob]:
+        """Blocking: job dengan prioritas tertinggi yang belum di-cancel (None saat stop)"""
+        with self._condition:
+            while True:
+                if self._stopping:
+                    return None
+                while self._heap:
+                    _, _, job_id = heapq.heappop(self._heap)
+                    job = self.jobs[job_id]
+                    if job.status == RenderJob.QUEUED:
+                        job.status = RenderJob.RUNNING
+                        job.started = time.time()
+                        return job
+                self._condition.wait()
+
+    def finish(self, job: RenderJob, status: str, output_file: Optional[str] = None,
+               error: Optional[str] = None, output_files: Optional[List[str]] = None):
+        with self._lock:
+            job.status = status
+            job.output_file = output_file
+            job.output_files = output_files or ([output_file] if output_file else [])
+            job.error = error
+            job.finished = time.time()
+        icon = {'done': '✅', 'failed': '❌', 'cancelled': '🚫'}[status]
+        self.log(f"{icon} {job.id} {status} in {job.finished - job.started:.1f}s" +
+                 (f": {output_file or error}" if output_file or error else ""))
+
+    def cancel(self, job_id: str) -> Optional[RenderJob]:
+        """Cancel job queued (langsung) atau running (worker di-restart); None jika tidak ada"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        with self._condition:
+            if job.status == RenderJob.QUEUED:
+                # Entry heap dibuang lazy oleh next_job
+                job.status = RenderJob.CANCELLED
+                job.finished = time.time()
+                self.log(f"🚫 {job.id} cancelled (queued)")
+            elif job.status == RenderJob.RUNNING:
+                job.cancel_requested = True
+        return job
+
+    def get(self, job_id: str) -> Optional[RenderJob]:
+        return self.jobs.get(job_id)
+
+    def list_jobs(self) -> List[RenderJob]:
+        return sorted(self.jobs.values(), key=lambda job: job.created)
+
+    def health(self) -> Dict:
+        with self._condition:
+            queued = sum(1 for job in self.jobs.values() if job.status == RenderJob.QUEUED)
+        return {
+            'workers': [worker.to_dict() for worker in self.workers],
+            'queued': queued,
+            'jobs': len(self.jobs)
+        }
+
+    def watch_folder(self, watch_dir: str, interval: float = 2.0):
+        """Thread: submit file .txt baru di drop folder (file yang masih ditulis ditunggu dulu)"""
+        seen = {}
+        os.makedirs(watch_dir, exist_ok=True)
+
+        def scan():
+            while not self._stopping:
+                for file_path in vg.collect_text_files([watch_dir]):
+                    try:
+                        stat = os.stat(file_path)
+                    except OSError:
+                        continue
+                    signature = (stat.st_mtime, stat.st_size)
+                    if seen.get(file_path) == signature or time.time() - stat.st_mtime < interval:
+                        continue
+                    seen[file_path] = signature
+                    name = os.path.basename(file_path).lower()
+                    priority = 'breaking' if name.startswith('breaking') else 'normal'
+                    self.submit(input_file=file_path, priority=priority, source='watch')
+                time.sleep(interval)
+
+        threading.Thread(target=scan, name="drop-folder", daemon=True).start()
+        self.log(f"👀 Watching drop folder: {watch_dir}")
+
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """JSON API di atas RenderService (lihat docstring module)"""
+
+    service = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _job_from_path(self) -> Optional[RenderJob]:
+        parts = self.path.strip('/').split('/')
+        job = self.service.get(parts[1]) if len(parts) >= 2 else None
+        if job is None:
+            self._send_json(404, {'error': 'job not found'})
+        return job
+
+    def do_GET(self):
+        path = self.path.rstrip('/')
+        if path == '/health':
+            self._send_json(200, self.service.health())
+        elif path == '/jobs':
+            self._send_json(200, [job.to_dict() for job in self.service.list_jobs()])
+        elif path.startswith('/jobs/') and path.endswith('/output'):
+            job = self._job_from_path()
+            if job is None:
+                return
+            if job.status != RenderJob.DONE or not os.path.exists(job.output_file):
+                self._send_json(409, {'error': f"output not available (status {job.status})"})
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "video/mp4")
+            self.send_header("Content-Length", str(os.path.getsize(job.output_file)))
+            self.send_header("Content-Disposition", f'attachment; filename="{os.path.basename(job.output_file)}"')
+            self.end_headers()
+            with open(job.output_file, 'rb') as f:
+                while True:
+                    chunk = f.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    self.wfile.write(chunk)
+        elif path.startswith('/jobs/'):
+            job = self._job_from_path()
+            if job is not None:
+                self._send_json(200, job.to_dict())
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        path = self.path.rstrip('/')
+        if path.startswith('/jobs/') and path.endswith('/cancel'):
+            self.do_DELETE()
+            return
+        if path != '/jobs':
+            self._send_json(404, {'error': 'not found'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            payload = json.loads(self.rfile.read(length) or b'{}')
+            job = self.service.submit(
+                input_file=payload.get('input'),
+                text=payload.get('text'),
+                name=payload.get('name'),
+                priority=payload.get('priority'),
+                output_dir=payload.get('output_dir')
+            )
+        except (ValueError, TypeError) as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        self._send_json(201, job.to_dict())
+
+    def do_DELETE(self):
+        job = self._job_from_path()
+        if job is None:
+            return
+        if job.is_finished:
+            self._send_json(409, {'error': f"job already {job.status}"})
+            return
+        self._send_json(202, self.service.cancel(job.id).to_dict())
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="videogen_beta render queue service")
+    parser.add_argument("-o", "--output", default="output", help="Output folder default")
+    parser.add_argument("--host", default="127.0.0.1", help="HTTP bind address")
+    parser.add_argument("--port", type=int, default=8765, help="HTTP port (0 = tanpa HTTP API)")
+    parser.add_argument("--workers", type=int, default=1, help="Jumlah worker process persisten")
+    parser.add_argument("--watch", default=None, help="Drop folder yang dipantau untuk file .txt baru")
+    parser.add_argument("--watch-interval", type=float, default=2.0, help="Interval scan drop folder (detik)")
+    parser.add_argument("--template", choices=sorted(vg.default_templates()), default="default",
+                        help="Template name")
+    parser.add_argument("--segment-workers", type=int, default=1, help="Render segment paralel per job")
+    parser.add_argument("--cache-dir", default=None, help="Cache segment ter-encode")
+    parser.add_argument("--metrics-file", default=None, help="Metrics JSON lines per job/segment")
+    parser.add_argument("--outputs", nargs="+", choices=sorted(vg.OUTPUT_PROFILES), default=None,
+                        help="Rendition output (default: outputs dari template)")
+    parser.add_argument("--text-backend", choices=vg.TEXT_BACKENDS, default="atlas",
+                        help="Rasterizer text layer (atlas tetap warm di worker)")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None):
+    args = build_arg_parser().parse_args(argv)
+
+    generator = vg.VideoGenerator(headless=True)
+    generator.template_name = args.template
+    generator.output_dir = args.output
+    generator.segment_workers = args.segment_workers
+    generator.segment_cache_dir = args.cache_dir
+    generator.metrics_file = args.metrics_file
+    generator.text_backend = args.text_backend
+    generator.output_profiles = args.outputs
+
+    # SIGTERM (systemd / docker stop) diperlakukan seperti Ctrl+C supaya worker ikut berhenti
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    service = RenderService(args.output, workers=args.workers, options=generator.get_job_options())
+    service.start()
+    if args.watch:
+        service.watch_folder(args.watch, args.watch_interval)
+
+    try:
+        if args.port:
+            ServiceRequestHandler.service = service
+            server = ThreadingHTTPServer((args.host, args.port), ServiceRequestHandler)
+            service.log(f"🌐 HTTP API on http://{args.host}:{server.server_address[1]}")
+            server.serve_forever()
+        else:
+            while True:
+                time.sleep(3600)
+    except (KeyboardInterrupt, SystemExit):
+        service.log("🛑 Stopping render service...")
+    finally:
+        service.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,44 @@
-from moviepy.editor import ImageClip, CompositeVideoClip, concatenate_videoclips
 from PIL import Image, ImageDraw, ImageFont
 import numpy as np
 import os
-import tkinter as tk
-from tkinter import filedialog, messagebox
+import sys
+import argparse
 import threading
+import multiprocessing
+import queue
+import bisect
 import time
 import re
-from typing import List, Dict, Tuple, Optional
+import math
+import mmap
+import shutil
+import signal
+import subprocess
+import tempfile
+import hashlib
+import json
+import cProfile
+from collections import OrderedDict
+from collections.abc import Mapping
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import List, Dict, Tuple, Optional, Iterator, Callable
+
+# tkinter dan moviepy.editor di-import lazy: headless render tidak pernah
+# memuat GUI stack, dan moviepy hanya dimuat saat fallback encoder dipakai
+tk = None
+filedialog = None
+messagebox = None
+
+
+def _load_tkinter():
+    """Import tkinter saat GUI benar-benar dibuat"""
+    global tk, filedialog, messagebox
+    if tk is None:
+        import tkinter
+        from tkinter import filedialog as tk_filedialog, messagebox as tk_messagebox
+        tk, filedialog, messagebox = tkinter, tk_filedialog, tk_messagebox
+    return tk
 
 class HighlightStyle:
     """Definisi style untuk highlighting"""
@@ -23,11 +54,526 @@ class HighlightStyle:
                  color: Tuple[int, int, int] = BLUE_HIGHLIGHT,
                  opacity: float = 0.8,
                  padding: int = 4,
-                 animation_speed: float = 0.25):
+                 animation_speed: float = 0.25,
+                 easing: str = 'linear'):
         self.color = color
         self.opacity = opacity
         self.padding = padding
+        # Fraksi durasi segment untuk reveal highlight ini (lihat HighlightTimeline)
         self.animation_speed = animation_speed
+        self.easing = easing
+
+# Style registry dibuat sekali, bukan dict baru setiap get_highlight_style
+HIGHLIGHT_STYLES = {
+    'blue': HighlightStyle(HighlightStyle.BLUE_HIGHLIGHT),
+    'red': HighlightStyle(HighlightStyle.RED_HIGHLIGHT),
+    'green': HighlightStyle(HighlightStyle.GREEN_HIGHLIGHT),
+    'yellow': HighlightStyle(HighlightStyle.YELLOW_HIGHLIGHT),
+    'purple': HighlightStyle(HighlightStyle.PURPLE_HIGHLIGHT),
+    'important': HighlightStyle(HighlightStyle.RED_HIGHLIGHT, opacity=0.9, animation_speed=0.2),
+    'success': HighlightStyle(HighlightStyle.GREEN_HIGHLIGHT, opacity=0.8),
+    'warning': HighlightStyle(HighlightStyle.YELLOW_HIGHLIGHT, opacity=0.7),
+    'fast': HighlightStyle(HighlightStyle.BLUE_HIGHLIGHT, animation_speed=0.15),
+    'slow': HighlightStyle(HighlightStyle.BLUE_HIGHLIGHT, animation_speed=0.4),
+    'smooth': HighlightStyle(HighlightStyle.BLUE_HIGHLIGHT, animation_speed=0.3, easing='ease_in_out'),
+}
+
+
+# Easing reveal highlight: progress 0..1 -> 0..1, monoton naik (vektor NumPy)
+EASINGS = {
+    'linear': lambda p: p,
+    'ease_in': lambda p: p * p,
+    'ease_out': lambda p: 1.0 - (1.0 - p) ** 2,
+    'ease_in_out': lambda p: p * p * (3.0 - 2.0 * p),
+}
+
+
+class HighlightTimeline:
+    """Timeline reveal highlight: keyframe + easing per highlight, dihitung sekali per segment
+    
+    Highlight di-reveal berurutan; highlight i punya keyframe
+    (keyframe_start[i], keyframe_end[i]) dalam satuan frame dengan durasi
+    total_frames * animation_speed * chars_i / total_chars. Jika semua style
+    memakai speed yang sama dan easing linear, hasilnya persis rumus lama
+    frame_idx / (total_frames * speed).
+    
+    State per frame adalah jumlah karakter ter-highlight (chars); frame
+    dengan state sama identik secara pixel.
+    """
+    
+    def __init__(self,
+                 highlight_chars: np.ndarray,
+                 speeds: np.ndarray,
+                 easings: List[str],
+                 total_frames: int):
+        self.highlight_chars = np.asarray(highlight_chars, dtype=np.int64)
+        self.speeds = np.asarray(speeds, dtype=np.float64)
+        self.easings = list(easings)
+        self.total_frames = total_frames
+        self.total_chars = int(self.highlight_chars.sum())
+        
+        durations = total_frames * self.speeds * self.highlight_chars / max(1, self.total_chars)
+        self.keyframe_end = np.cumsum(durations)
+        self.keyframe_start = self.keyframe_end - durations
+        
+        self.chars = self.chars_for(np.arange(total_frames))
+        self.widths = None
+    
+    @classmethod
+    def from_layout(cls, layout: 'CompiledLayout', total_frames: int) -> 'HighlightTimeline':
+        """Timeline + lebar bar semua frame (shape (frames, highlights)) untuk satu layout"""
+        timeline = cls(layout.highlight_chars, layout.highlight_speed, layout.highlight_easing, total_frames)
+        timeline.widths = layout.highlight_widths(timeline.chars)
+        return timeline
+    
+    @property
+    def uniform(self) -> bool:
+        """Semua highlight linear dengan speed sama -> satu keyframe linear untuk seluruh teks"""
+        return (all(easing == 'linear' for easing in self.easings)
+                and (len(self.speeds) == 0 or bool(np.all(self.speeds == self.speeds[0]))))
+    
+    def chars_for(self, frame_idx: np.ndarray) -> np.ndarray:
+        """Jumlah karakter ter-highlight untuk frame-frame tertentu"""
+        frame_idx = np.asarray(frame_idx, dtype=np.float64)
+        if self.uniform:
+            speed = self.speeds[0] if len(self.speeds) else 0.25
+            progress = np.minimum(1.0, frame_idx / max(1, self.total_frames * speed))
+            return (self.total_chars * progress).astype(np.int64)
+        
+        chars = np.zeros(frame_idx.shape, dtype=np.int64)
+        for i in range(len(self.highlight_chars)):
+            start, end = self.keyframe_start[i], self.keyframe_end[i]
+            if end > start:
+                progress = np.clip((frame_idx - start) / (end - start), 0.0, 1.0)
+            else:
+                progress = (frame_idx >= end).astype(np.float64)
+            eased = EASINGS.get(self.easings[i], EASINGS['linear'])(progress)
+            chars += (self.highlight_chars[i] * eased).astype(np.int64)
+        return chars
+    
+    def chars_at(self, frame_idx: int) -> int:
+        return int(self.chars[max(0, min(self.total_frames - 1, frame_idx))]) if self.total_frames else 0
+    
+    def static_runs(self, start: int = 0, end: Optional[int] = None) -> List[Tuple[int, int]]:
+        """Run [a, b) frame dengan state sama di dalam [start, end) - cukup di-render sekali per run"""
+        end = self.total_frames if end is None else min(end, self.total_frames)
+        if end <= start:
+            return []
+        boundaries = np.flatnonzero(np.diff(self.chars[start:end])) + start + 1
+        edges = [start] + boundaries.tolist() + [end]
+        return list(zip(edges[:-1], edges[1:]))
+
+
+class CompiledLayout:
+    """Layout satu segment dalam bentuk NumPy arrays - dihitung sekali per segment
+    
+    Words: posisi x/y dan lebar. Highlights: kotak dasar, style yang sudah
+    di-resolve (warna, alpha, padding), offset karakter kumulatif dan tabel
+    lebar prefix, sehingga geometri highlight semua frame bisa dihitung
+    dalam satu pass vektor.
+    """
+    
+    def __init__(self,
+                 words: List[str],
+                 word_x: np.ndarray,
+                 word_y: np.ndarray,
+                 word_width: np.ndarray,
+                 highlight_x: np.ndarray,
+                 highlight_y: np.ndarray,
+                 highlight_height: np.ndarray,
+                 highlight_full_width: np.ndarray,
+                 highlight_prefix_widths: np.ndarray,
+                 highlight_chars: np.ndarray,
+                 highlight_color: np.ndarray,
+                 highlight_alpha: np.ndarray,
+                 highlight_padding: np.ndarray,
+                 highlight_speed: Optional[np.ndarray] = None,
+                 highlight_easing: Optional[List[str]] = None,
+                 highlight_offset_y: float = 4):
+        self.words = words
+        self.word_x = word_x
+        self.word_y = word_y
+        self.word_width = word_width
+        self.highlight_x = highlight_x
+        self.highlight_y = highlight_y
+        self.highlight_height = highlight_height
+        self.highlight_full_width = highlight_full_width
+        self.highlight_prefix_widths = highlight_prefix_widths
+        self.highlight_chars = highlight_chars
+        self.highlight_color = highlight_color
+        self.highlight_alpha = highlight_alpha
+        self.highlight_padding = highlight_padding
+        self.highlight_offset_y = highlight_offset_y
+        count = len(highlight_chars)
+        self.highlight_speed = (np.full(count, 0.25) if highlight_speed is None
+                                else np.asarray(highlight_speed, dtype=np.float64))
+        self.highlight_easing = list(highlight_easing) if highlight_easing is not None else ['linear'] * count
+        
+        # Offset karakter kumulatif: highlight ke-i mulai di char_offsets[i]
+        self.char_offsets = np.concatenate(([0], np.cumsum(highlight_chars))).astype(np.int64)
+        self.total_chars = int(self.char_offsets[-1])
+    
+    @property
+    def highlight_count(self) -> int:
+        return len(self.highlight_chars)
+    
+    def highlight_widths(self, current_chars: np.ndarray) -> np.ndarray:
+        """Lebar bar setiap highlight untuk setiap frame - shape (frames, highlights)
+        
+        Lebar 0 berarti bar belum terlihat pada frame tersebut.
+        """
+        current_chars = np.asarray(current_chars, dtype=np.int64).reshape(-1, 1)
+        chars_to_highlight = np.clip(current_chars - self.char_offsets[None, :-1],
+                                     0, self.highlight_chars[None, :])
+        
+        rows = np.arange(self.highlight_count)[None, :]
+        widths = self.highlight_prefix_widths[rows, chars_to_highlight]
+        widths = np.where(chars_to_highlight >= self.highlight_chars[None, :],
+                          self.highlight_full_width[None, :], widths)
+        return np.where(chars_to_highlight > 0, widths, 0.0)
+    
+    def highlight_rects(self, widths: np.ndarray) -> np.ndarray:
+        """Kotak [x0, y0, x1, y1] setiap bar untuk satu frame (baris dari highlight_widths)"""
+        y0 = self.highlight_y + self.highlight_offset_y  # Adjust Y position (turun 4 unit)
+        return np.stack([
+            self.highlight_x - self.highlight_padding,
+            y0,
+            self.highlight_x + widths + self.highlight_padding,
+            y0 + self.highlight_height
+        ], axis=1)
+
+
+def _blend_u8(top, bottom: np.ndarray, alpha) -> np.ndarray:
+    """Fixed-point blend uint8: top * alpha + bottom * (255 - alpha), alpha 0..255
+    
+    Rumus pembulatan sama dengan BLEND di Pillow (selisih maksimal ±1).
+    """
+    tmp = (np.asarray(top, dtype=np.int32) - bottom) * alpha + 128
+    return (bottom + (((tmp >> 8) + tmp) >> 8)).astype(np.uint8)
+
+
+class HighlightCompositor:
+    """Compositing highlight bar langsung ke frame buffer uint8 yang di-reuse
+    
+    Hanya pixel di dalam kotak highlight yang disentuh: setiap kotak di-blend
+    dari background lalu glyph teks di-blend ulang di atasnya. Pixel di luar
+    kotak diambil dari text_frame (background + teks) yang dibuat sekali.
+    
+    Dengan incremental=True buffer dipertahankan antar frame: karena bar
+    hanya bertambah panjang, frame berikutnya cukup me-repaint strip kotor
+    antara tepi bar sebelumnya dan tepi bar sekarang.
+    """
+    
+    def __init__(self,
+                 background: np.ndarray,
+                 text_mask: np.ndarray,
+                 text_color: Tuple[int, int, int],
+                 incremental: bool = True):
+        self.background = background
+        self.text_mask = text_mask[..., None].astype(np.int32)
+        self.text_color = np.array(text_color, dtype=np.int32)
+        self.height, self.width = background.shape[:2]
+        
+        # Background + teks: frame tanpa highlight, dibuat sekali per segment
+        self.text_frame = _blend_u8(self.text_color, background.astype(np.int32), self.text_mask)
+        self.buffer = np.empty_like(self.text_frame)
+        
+        # Lebar bar yang saat ini ada di buffer (None = buffer belum valid)
+        self.incremental = incremental
+        self._painted_widths = None
+        self.pixels_painted = 0
+    
+    def pixel_bounds(self, rect) -> Optional[Tuple[int, int, int, int]]:
+        """Kotak float [x0, y0, x1, y1] (inklusif, seperti ImageDraw.rectangle) ke slice pixel"""
+        x0 = max(0, int(rect[0]))
+        y0 = max(0, int(rect[1]))
+        x1 = min(self.width, int(rect[2]) + 1)
+        y1 = min(self.height, int(rect[3]) + 1)
+        if x1 <= x0 or y1 <= y0:
+            return None
+        return x0, y0, x1, y1
+    
+    def paint_region(self, bounds: Tuple[int, int, int, int], color: np.ndarray, alpha: int):
+        """Blend satu kotak highlight + teks di atasnya ke buffer"""
+        x0, y0, x1, y1 = bounds
+        self.pixels_painted += (x1 - x0) * (y1 - y0)
+        region = _blend_u8(color, self.background[y0:y1, x0:x1].astype(np.int32), int(alpha))
+        self.buffer[y0:y1, x0:x1] = _blend_u8(self.text_color, region.astype(np.int32),
+                                              self.text_mask[y0:y1, x0:x1])
+    
+    def render(self, layout: CompiledLayout, widths: np.ndarray) -> np.ndarray:
+        """Render satu frame ke buffer (di-reuse - copy jika frame perlu disimpan)"""
+        if not (self.incremental and self._render_incremental(layout, widths)):
+            self._render_full(layout, widths)
+        self._painted_widths = np.array(widths, dtype=np.float64)
+        return self.buffer
+    
+    def _render_full(self, layout: CompiledLayout, widths: np.ndarray):
+        np.copyto(self.buffer, self.text_frame)
+        self.pixels_painted += self.buffer.shape[0] * self.buffer.shape[1]
+        
+        rects = layout.highlight_rects(widths)
+        # Kotak yang digambar belakangan menimpa yang sebelumnya, sama seperti highlight layer RGBA
+        for i in np.flatnonzero(widths > 0):
+            bounds = self.pixel_bounds(rects[i])
+            if bounds is not None:
+                self.paint_region(bounds, layout.highlight_color[i], layout.highlight_alpha[i])
+    
+    def _render_incremental(self, layout: CompiledLayout, widths: np.ndarray) -> bool:
+        """Repaint hanya strip kotor; False jika harus full render"""
+        previous = self._painted_widths
+        if previous is None or previous.shape != widths.shape or np.any(widths < previous):
+            return False
+        
+        changed = np.flatnonzero(widths != previous)
+        if len(changed) == 0:
+            return True
+        
+        visible = np.flatnonzero(widths > 0)
+        new_rects = layout.highlight_rects(widths)
+        old_rects = layout.highlight_rects(previous)
+        
+        dirty = []
+        for i in changed:
+            bounds = self.pixel_bounds(new_rects[i])
+            if bounds is None:
+                continue
+            x0, y0, x1, y1 = bounds
+            if previous[i] > 0:
+                # Bar sudah ada: cukup strip antara tepi lama dan tepi baru
+                old_bounds = self.pixel_bounds(old_rects[i])
+                if old_bounds is not None:
+                    x0 = max(x0, old_bounds[2])
+            if x1 <= x0:
+                continue
+            
+            # Strip yang menimpa bar lain (overlap padding) -> full render supaya urutan tetap benar
+            for j in visible:
+                if j == i:
+                    continue
+                other = self.pixel_bounds(new_rects[j])
+                if other is not None and other[0] < x1 and x0 < other[2] and other[1] < y1 and y0 < other[3]:
+                    return False
+            dirty.append((i, (x0, y0, x1, y1)))
+        
+        for i, bounds in dirty:
+            self.paint_region(bounds, layout.highlight_color[i], layout.highlight_alpha[i])
+        return True
+
+
+class TextMeasureCache:
+    """Bounded LRU cache untuk font.getlength, satu cache per (font, size)
+    
+    Kata yang sama diukur berkali-kali saat wrap, layout dan render;
+    FreeType cukup dipanggil sekali per (font, size, text).
+    """
+    
+    def __init__(self, max_entries_per_font: int = 8192):
+        self.max_entries_per_font = max_entries_per_font
+        self.hits = 0
+        self.misses = 0
+        self._caches = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def font_key(font) -> Tuple:
+        """Identitas font: path file + size (load_default font pakai id)"""
+        return (getattr(font, 'path', None) or id(font), getattr(font, 'size', None))
+    
+    def get_length(self, font, text: str) -> float:
+        """font.getlength(text) dengan cache"""
+        key = self.font_key(font)
+        with self._lock:
+            cache = self._caches.get(key)
+            if cache is None:
+                cache = self._caches[key] = OrderedDict()
+            
+            width = cache.get(text)
+            if width is not None:
+                cache.move_to_end(text)
+                self.hits += 1
+                return width
+            self.misses += 1
+        
+        width = font.getlength(text)
+        
+        with self._lock:
+            cache[text] = width
+            if len(cache) > self.max_entries_per_font:
+                cache.popitem(last=False)
+        return width
+    
+    def stats(self) -> Dict:
+        """Hit/miss counters untuk inspeksi"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'fonts': len(self._caches),
+            'entries': sum(len(cache) for cache in self._caches.values())
+        }
+    
+    def clear(self):
+        with self._lock:
+            self._caches.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Process-wide measurement cache, dipakai semua AdvancedHighlightProcessor
+TEXT_MEASURE_CACHE = TextMeasureCache()
+
+# Karakter yang dipakai cerita kita (Indonesia/Latin), untuk warm atlas
+LATIN_CHARSET = (
+    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    "0123456789.,;:!?'\"()[]-–—%&/+=@#$*…“”‘’éèÉ"
+)
+
+TEXT_BACKENDS = ['pillow', 'atlas']
+
+
+class GlyphAtlas:
+    """Atlas glyph bersama: setiap (font, size, glyph, subpixel phase) di-rasterize sekali
+
+    Coverage mask glyph disimpan sebagai array uint8 plus offset bitmap.
+    Posisi pen diambil dari advance per karakter + koreksi kerning per
+    pasangan, jadi sama dengan font.getlength(prefix). Glyph yang tumpang
+    tindih digabung dengan rumus "screen" (a + b - a*b/255) seperti layer
+    FreeType Pillow, sehingga hasilnya pixel-identik dengan ImageDraw.text
+    untuk font dengan layout engine BASIC. Dengan raqm Pillow men-shape
+    seluruh string (ligatur fi/fl, bentuk kontekstual) - glyph per karakter
+    tidak bisa menirunya, jadi processor memakai backend pillow.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._glyphs = {}
+        self._advances = {}
+        self._kerning = {}
+        self._lock = threading.Lock()
+
+    def _font_tables(self, font) -> Tuple[Dict, Dict, Dict]:
+        key = TextMeasureCache.font_key(font)
+        with self._lock:
+            if key not in self._glyphs:
+                self._glyphs[key] = {}
+                self._advances[key] = {}
+                self._kerning[key] = {}
+            return self._glyphs[key], self._advances[key], self._kerning[key]
+
+    def glyph(self, font, char: str, phase_x: float, phase_y: float = 0.0) -> Optional[Tuple[np.ndarray, int, int]]:
+        """(mask, offset_x, offset_y) untuk satu glyph; None untuk glyph kosong (spasi)"""
+        glyphs, _, _ = self._font_tables(font)
+        key = (char, phase_x, phase_y)
+        entry = glyphs.get(key, False)
+        if entry is not False:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        mask, offset = font.getmask2(char, "L", start=(phase_x, phase_y))
+        if mask.size[0] == 0 or mask.size[1] == 0:
+            entry = None
+        else:
+            # Image.core mask -> array via Image, sekali per entry
+            array = np.asarray(Image.frombytes("L", mask.size, bytes(mask)))
+            entry = (array, offset[0], offset[1])
+        glyphs[key] = entry
+        return entry
+
+    def pen_positions(self, font, text: str) -> List[float]:
+        """Posisi pen tiap karakter relatif ke awal text (= getlength(text[:i]))"""
+        _, advances, kerning = self._font_tables(font)
+        positions = []
+        pen = 0.0
+        previous = None
+        for char in text:
+            if previous is not None:
+                pair = previous + char
+                kern = kerning.get(pair)
+                if kern is None:
+                    kern = kerning[pair] = (font.getlength(pair)
+                                            - self._advance(font, advances, previous)
+                                            - self._advance(font, advances, char))
+                pen += self._advance(font, advances, previous) + kern
+            positions.append(pen)
+            previous = char
+        return positions
+
+    @staticmethod
+    def _advance(font, advances: Dict, char: str) -> float:
+        advance = advances.get(char)
+        if advance is None:
+            advance = advances[char] = font.getlength(char)
+        return advance
+
+    def draw_text(self, target: np.ndarray, xy: Tuple[float, float], text: str, font):
+        """Blit text ke mask uint8 2D (pengganti ImageDraw.text(..., fill=255) di mode "L")"""
+        x, y = xy
+        base_x, frac_x = int(math.floor(x)), x - math.floor(x)
+        base_y, frac_y = int(math.floor(y)), y - math.floor(y)
+        height, width = target.shape
+
+        for char, pen in zip(text, self.pen_positions(font, text)):
+            phase = frac_x + pen
+            entry = self.glyph(font, char, phase - math.floor(phase), frac_y)
+            if entry is None:
+                continue
+            mask, offset_x, offset_y = entry
+            left = base_x + int(math.floor(phase)) + offset_x
+            top = base_y + offset_y
+
+            # Clip ke ukuran target
+            src_left, src_top = max(0, -left), max(0, -top)
+            dst_left, dst_top = max(0, left), max(0, top)
+            dst_right = min(width, left + mask.shape[1])
+            dst_bottom = min(height, top + mask.shape[0])
+            if dst_right <= dst_left or dst_bottom <= dst_top:
+                continue
+
+            src = mask[src_top:src_top + dst_bottom - dst_top, src_left:src_left + dst_right - dst_left]
+            region = target[dst_top:dst_bottom, dst_left:dst_right]
+            if not region.any():
+                region[...] = src
+                continue
+
+            # Screen blend dengan pembagian /255 yang sama seperti Pillow
+            a = region.astype(np.uint32)
+            product = a * src + 128
+            region[...] = a + src - (((product >> 8) + product) >> 8)
+
+    def warm(self, font, charset: str = LATIN_CHARSET):
+        """Rasterize charset di phase 0 + advance-nya (untuk worker yang long-lived)"""
+        _, advances, _ = self._font_tables(font)
+        for char in charset:
+            self._advance(font, advances, char)
+            self.glyph(font, char, 0.0, 0.0)
+
+    def stats(self) -> Dict:
+        """Hit/miss counters untuk inspeksi"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'fonts': len(self._glyphs),
+            'glyphs': sum(len(glyphs) for glyphs in self._glyphs.values())
+        }
+
+    def clear(self):
+        with self._lock:
+            self._glyphs.clear()
+            self._advances.clear()
+            self._kerning.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Process-wide glyph atlas, tetap warm selama process (worker) hidup
+GLYPH_ATLAS = GlyphAtlas()
+
 
 class AdvancedHighlightProcessor:
     """Advanced text highlighting dengan smooth animations"""
@@ -39,7 +585,11 @@ class AdvancedHighlightProcessor:
                  margin_left: int = 70,
                  margin_right: int = 90,
                  bg_color: Tuple[int, int, int] = (0, 0, 0),
-                 text_color: Tuple[int, int, int] = (255, 255, 255)):
+                 text_color: Tuple[int, int, int] = (255, 255, 255),
+                 cache_text_layer: bool = True,
+                 inplace_blending: bool = True,
+                 text_backend: str = 'atlas',
+                 unit: float = 1.0):
         self.font = font
         self.video_width = video_width
         self.video_height = video_height
@@ -48,6 +598,26 @@ class AdvancedHighlightProcessor:
         self.bg_color = bg_color
         self.text_color = text_color
         
+        # Pixel per layout unit (1.0 = desain 720 px lebar); padding, jarak
+        # baris dan offset highlight ikut di-scale untuk resolusi lain
+        self.unit = unit
+        
+        # Render mode: rasterize text sekali per segment lalu reuse sebagai mask
+        self.cache_text_layer = cache_text_layer
+        
+        # Blend highlight langsung di NumPy buffer (butuh cached text layer)
+        self.inplace_blending = inplace_blending
+        
+        # Text layer via GLYPH_ATLAS (NumPy blit) atau ImageDraw.text per kata;
+        # atlas butuh font FreeType dengan path file dan layout BASIC (raqm men-shape
+        # string utuh, hasilnya bisa beda dari glyph per karakter)
+        if text_backend not in TEXT_BACKENDS:
+            raise ValueError(f"Unknown text backend '{text_backend}' (pilih: {', '.join(TEXT_BACKENDS)})")
+        if text_backend == 'atlas' and (not getattr(font, 'path', None) or
+                                        getattr(font, 'layout_engine', None) != ImageFont.Layout.BASIC):
+            text_backend = 'pillow'
+        self.text_backend = text_backend
+        
         # Calculate available width for text
         self.text_width = video_width - margin_left - margin_right
         
@@ -56,12 +626,15 @@ class AdvancedHighlightProcessor:
         
         # Default highlight style
         self.default_style = HighlightStyle()
+        
+        # Timeline terakhir untuk API per frame: (key, highlight_segments, timeline)
+        self._timeline_cache = None
     
     def _calculate_line_height(self) -> int:
         """Calculate line height from font metrics"""
         try:
             bbox = self.font.getbbox("Ag")
-            return bbox[3] - bbox[1] + 8
+            return bbox[3] - bbox[1] + int(round(8 * self.unit))
         except:
             return int(self.font.size * 1.2)
     
@@ -142,9 +715,9 @@ class AdvancedHighlightProcessor:
         return lines
     
     def _get_text_width(self, text: str) -> float:
-        """Get text width using font metrics"""
+        """Get text width using font metrics (cached)"""
         try:
-            return self.font.getlength(text)
+            return TEXT_MEASURE_CACHE.get_length(self.font, text)
         except:
             return len(text) * (self.font.size * 0.6)
     
@@ -174,7 +747,9 @@ class AdvancedHighlightProcessor:
                         'char_start': char_counter,
                         'char_end': char_counter + len(word),
                         'style': style,
-                        'line_idx': line_idx
+                        'line_idx': line_idx,
+                        # Lebar prefix parsial dihitung sekali per segment, bukan per frame
+                        'prefix_widths': [self._get_text_width(word[:n]) for n in range(len(word) + 1)]
                     })
                 
                 word_width = self._get_text_width(word + " ")
@@ -188,40 +763,185 @@ class AdvancedHighlightProcessor:
         if not style_name:
             return self.default_style
         
-        styles = {
-            'blue': HighlightStyle(HighlightStyle.BLUE_HIGHLIGHT),
-            'red': HighlightStyle(HighlightStyle.RED_HIGHLIGHT),
-            'green': HighlightStyle(HighlightStyle.GREEN_HIGHLIGHT),
-            'yellow': HighlightStyle(HighlightStyle.YELLOW_HIGHLIGHT),
-            'purple': HighlightStyle(HighlightStyle.PURPLE_HIGHLIGHT),
-            'important': HighlightStyle(HighlightStyle.RED_HIGHLIGHT, opacity=0.9, animation_speed=0.2),
-            'success': HighlightStyle(HighlightStyle.GREEN_HIGHLIGHT, opacity=0.8),
-            'warning': HighlightStyle(HighlightStyle.YELLOW_HIGHLIGHT, opacity=0.7),
-            'fast': HighlightStyle(HighlightStyle.BLUE_HIGHLIGHT, animation_speed=0.15),
-            'slow': HighlightStyle(HighlightStyle.BLUE_HIGHLIGHT, animation_speed=0.4),
-        }
+        return HIGHLIGHT_STYLES.get(style_name.lower(), self.default_style)
+    
+    def highlight_chars_at(self, frame_idx: int, total_frames: int, highlight_segments: List[Dict]) -> int:
+        """Jumlah karakter yang sudah ter-highlight pada frame tertentu
+        
+        Ini satu-satunya state animasi per frame: dua frame dengan nilai
+        yang sama pasti identik secara pixel.
+        """
+        timeline = self.highlight_timeline(highlight_segments, total_frames)
+        if 0 <= frame_idx < total_frames:
+            return int(timeline.chars[frame_idx])
+        return int(timeline.chars_for(np.array([frame_idx]))[0])
+    
+    def highlight_timeline(self, highlight_segments: List[Dict], total_frames: int) -> HighlightTimeline:
+        """Timeline segment, di-cache supaya API per frame tidak O(total_frames) per frame
+        
+        List highlight_segments ikut disimpan di cache, jadi id()-nya tidak
+        bisa dipakai ulang object lain selama entry masih ada.
+        """
+        key = (id(highlight_segments), total_frames)
+        cached = self._timeline_cache
+        if cached is not None and cached[0] == key:
+            return cached[2]
+        styles = [self.get_highlight_style(seg['style']) for seg in highlight_segments]
+        timeline = HighlightTimeline(
+            [len(seg['text']) for seg in highlight_segments],
+            [style.animation_speed for style in styles],
+            [style.easing for style in styles],
+            total_frames
+        )
+        self._timeline_cache = (key, highlight_segments, timeline)
+        return timeline
+    
+    def compile_layout(self, lines: List[List[Dict]], y_start: int,
+                       highlight_segments: List[Dict]) -> CompiledLayout:
+        """Compile wrapped lines + highlight segments menjadi CompiledLayout"""
+        words, word_x, word_y, word_width = [], [], [], []
+        for line_idx, line in enumerate(lines):
+            y_position = y_start + (line_idx * self.line_height)
+            x_position = self.margin_left
+            
+            for word_info in line:
+                width = self._get_text_width(word_info['word'] + " ")
+                words.append(word_info['word'])
+                word_x.append(x_position)
+                word_y.append(y_position)
+                word_width.append(width)
+                x_position += width
+        
+        count = len(highlight_segments)
+        max_chars = max([len(seg['text']) for seg in highlight_segments] + [0])
+        prefix_widths = np.zeros((count, max_chars + 1), dtype=np.float64)
+        styles = [self.get_highlight_style(seg['style']) for seg in highlight_segments]
+        
+        for i, seg in enumerate(highlight_segments):
+            prefixes = seg.get('prefix_widths') or [
+                self._get_text_width(seg['text'][:n]) for n in range(len(seg['text']) + 1)
+            ]
+            prefix_widths[i, :len(prefixes)] = prefixes
+        
+        return CompiledLayout(
+            words=words,
+            word_x=np.array(word_x, dtype=np.float64),
+            word_y=np.array(word_y, dtype=np.float64),
+            word_width=np.array(word_width, dtype=np.float64),
+            highlight_x=np.array([seg['x'] for seg in highlight_segments], dtype=np.float64),
+            highlight_y=np.array([seg['y'] for seg in highlight_segments], dtype=np.float64),
+            highlight_height=np.array([seg['height'] for seg in highlight_segments], dtype=np.float64),
+            highlight_full_width=np.array([seg['width'] - 8 * self.unit for seg in highlight_segments], dtype=np.float64),
+            highlight_prefix_widths=prefix_widths,
+            highlight_chars=np.array([len(seg['text']) for seg in highlight_segments], dtype=np.int64),
+            highlight_color=np.array([style.color for style in styles], dtype=np.uint8).reshape(count, 3),
+            highlight_alpha=np.array([int(255 * style.opacity) for style in styles], dtype=np.uint8),
+            highlight_padding=np.array([style.padding * self.unit for style in styles], dtype=np.float64),
+            highlight_speed=np.array([style.animation_speed for style in styles], dtype=np.float64),
+            highlight_easing=[style.easing for style in styles],
+            highlight_offset_y=4 * self.unit
+        )
+    
+    def render_compiled_frame(self,
+                              layout: CompiledLayout,
+                              widths: np.ndarray,
+                              text_layer: Optional[Image.Image] = None,
+                              background: Optional[np.ndarray] = None) -> np.ndarray:
+        """Render satu frame dari CompiledLayout - widths adalah satu baris highlight_widths"""
+        frame = self.new_frame(background)
+        highlight_layer = Image.new("RGBA", (self.video_width, self.video_height), (0, 0, 0, 0))
+        highlight_draw = ImageDraw.Draw(highlight_layer)
+        
+        rects = layout.highlight_rects(widths)
+        for i in np.flatnonzero(widths > 0):
+            color = tuple(int(c) for c in layout.highlight_color[i]) + (int(layout.highlight_alpha[i]),)
+            highlight_draw.rectangle(rects[i].tolist(), fill=color)
+        
+        frame = Image.alpha_composite(frame.convert("RGBA"), highlight_layer).convert("RGB")
+        
+        if text_layer is not None:
+            frame.paste(self.text_color, mask=text_layer)
+        else:
+            text_draw = ImageDraw.Draw(frame)
+            for word, x, y in zip(layout.words, layout.word_x.tolist(), layout.word_y.tolist()):
+                text_draw.text((x, y), word, font=self.font, fill=self.text_color)
+        
+        return np.array(frame)
+    
+    def new_frame(self, background: Optional[np.ndarray] = None) -> Image.Image:
+        """Frame kosong: background polos, atau layer statis scene jika diberikan"""
+        if background is not None:
+            return Image.fromarray(background)
+        return Image.new("RGB", (self.video_width, self.video_height), self.bg_color)
+    
+    def create_compositor(self, text_layer: Image.Image,
+                          background: Optional[np.ndarray] = None) -> HighlightCompositor:
+        """Compositor NumPy untuk satu segment di atas background polos atau layer scene"""
+        if background is None:
+            background = np.empty((self.video_height, self.video_width, 3), dtype=np.uint8)
+            background[...] = self.bg_color
+        return HighlightCompositor(background, np.array(text_layer), self.text_color)
+    
+    def render_text_layer(self, lines: List[List[Dict]], y_start: int) -> Image.Image:
+        """Rasterize semua kata sekali menjadi mask (mode "L") untuk di-reuse per frame"""
+        if self.text_backend == 'atlas':
+            return self._render_text_layer_atlas(lines, y_start)
+        
+        text_layer = Image.new("L", (self.video_width, self.video_height), 0)
+        layer_draw = ImageDraw.Draw(text_layer)
+        
+        for line_idx, line in enumerate(lines):
+            y_position = y_start + (line_idx * self.line_height)
+            x_position = self.margin_left
+            
+            for word_info in line:
+                word = word_info['word']
+                layer_draw.text((x_position, y_position), word, 
+                                font=self.font, fill=255)
+                
+                word_width = self._get_text_width(word + " ")
+                x_position += word_width
+        
+        return text_layer
+    
+    def _render_text_layer_atlas(self, lines: List[List[Dict]], y_start: int) -> Image.Image:
+        """Sama dengan render_text_layer, tapi glyph di-blit dari GLYPH_ATLAS"""
+        mask = np.zeros((self.video_height, self.video_width), dtype=np.uint8)
+        
+        for line_idx, line in enumerate(lines):
+            y_position = y_start + (line_idx * self.line_height)
+            x_position = self.margin_left
+            
+            for word_info in line:
+                word = word_info['word']
+                GLYPH_ATLAS.draw_text(mask, (x_position, y_position), word, self.font)
+                x_position += self._get_text_width(word + " ")
         
-        return styles.get(style_name.lower(), self.default_style)
+        return Image.fromarray(mask, "L")
     
     def render_frame_with_highlights(self, 
                                    lines: List[List[Dict]], 
                                    y_start: int,
                                    frame_idx: int, 
                                    total_frames: int,
-                                   highlight_segments: List[Dict]) -> np.ndarray:
-        """Render single frame dengan progressive highlighting"""
+                                   highlight_segments: List[Dict],
+                                   text_layer: Optional[Image.Image] = None,
+                                   background: Optional[np.ndarray] = None) -> np.ndarray:
+        """Render single frame dengan progressive highlighting
+        
+        Jika text_layer (dari render_text_layer) diberikan, teks tidak
+        di-rasterize ulang; mask tersebut cukup di-paste di atas highlight.
+        """
         
         # Create base image
-        frame = Image.new("RGB", (self.video_width, self.video_height), self.bg_color)
+        frame = self.new_frame(background)
         
         # Create highlight layer
         highlight_layer = Image.new("RGBA", (self.video_width, self.video_height), (0, 0, 0, 0))
         highlight_draw = ImageDraw.Draw(highlight_layer)
         
         # Calculate highlight progress
-        highlight_progress = min(1.0, (frame_idx / max(1, total_frames * 0.25)))
-        total_chars = sum(len(seg['text']) for seg in highlight_segments)
-        current_highlight_chars = int(total_chars * highlight_progress)
+        current_highlight_chars = self.highlight_chars_at(frame_idx, total_frames, highlight_segments)
         
         # Draw highlights
         highlighted_chars = 0
@@ -234,7 +954,9 @@ class AdvancedHighlightProcessor:
                     style = self.get_highlight_style(segment['style'])
                     
                     if chars_to_highlight >= len(segment['text']):
-                        highlight_width = segment['width'] - 8
+                        highlight_width = segment['width'] - 8 * self.unit
+                    elif 'prefix_widths' in segment:
+                        highlight_width = segment['prefix_widths'][chars_to_highlight]
                     else:
                         partial_text = segment['text'][:chars_to_highlight]
                         highlight_width = self._get_text_width(partial_text)
@@ -242,13 +964,14 @@ class AdvancedHighlightProcessor:
                     alpha = int(255 * style.opacity)
                     highlight_color = style.color + (alpha,)
                     
-                    # Adjust Y position (turun 6px)
-                    adjusted_y = segment['y'] + 4
+                    # Adjust Y position (turun 4 unit)
+                    adjusted_y = segment['y'] + 4 * self.unit
+                    padding = style.padding * self.unit
                     
                     highlight_draw.rectangle([
-                        segment['x'] - style.padding,
+                        segment['x'] - padding,
                         adjusted_y,
-                        segment['x'] + highlight_width + style.padding,
+                        segment['x'] + highlight_width + padding,
                         adjusted_y + segment['height']
                     ], fill=highlight_color)
                 
@@ -257,7 +980,11 @@ class AdvancedHighlightProcessor:
         # Composite highlight layer
         frame = Image.alpha_composite(frame.convert("RGBA"), highlight_layer).convert("RGB")
         
-        # Draw text on top
+        # Draw text on top - pakai cached mask jika tersedia
+        if text_layer is not None:
+            frame.paste(self.text_color, mask=text_layer)
+            return np.array(frame)
+        
         text_draw = ImageDraw.Draw(frame)
         
         for line_idx, line in enumerate(lines):
@@ -274,12 +1001,16 @@ class AdvancedHighlightProcessor:
         
         return np.array(frame)
     
-    def render_text_with_highlights(self, 
-                                  text: str, 
-                                  duration: float,
-                                  y_position: int = 400,
-                                  fps: int = 30) -> List[np.ndarray]:
-        """Render complete text dengan smooth highlight animation"""
+    def create_frame_source(self, 
+                            text: str, 
+                            duration: float,
+                            y_position: int = 400,
+                            fps: int = 30,
+                            background: Optional[np.ndarray] = None) -> 'HighlightFrameSource':
+        """Siapkan layout sekali, frame di-render lazy saat diminta encoder
+        
+        background: layer statis scene (RGB uint8) di bawah body animasi.
+        """
         
         # Parse dan wrap text
         lines = self.smart_wrap_with_highlights(text)
@@ -287,17 +1018,1356 @@ class AdvancedHighlightProcessor:
         # Calculate highlight segments
         highlight_segments = self.calculate_highlight_segments(lines, y_position)
         
-        # Generate frames
-        total_frames = int(fps * duration)
-        frames = []
+        # Text layer hanya di-rasterize sekali per segment
+        text_layer = None
+        if self.cache_text_layer:
+            text_layer = self.render_text_layer(lines, y_position)
         
-        for frame_idx in range(total_frames):
-            frame = self.render_frame_with_highlights(
-                lines, y_position, frame_idx, total_frames, highlight_segments
-            )
-            frames.append(frame)
+        compositor = None
+        if text_layer is not None and self.inplace_blending:
+            compositor = self.create_compositor(text_layer, background)
         
-        return frames
+        return HighlightFrameSource(
+            processor=self,
+            lines=lines,
+            y_start=y_position,
+            highlight_segments=highlight_segments,
+            total_frames=int(fps * duration),
+            fps=fps,
+            text_layer=text_layer,
+            layout=self.compile_layout(lines, y_position, highlight_segments),
+            compositor=compositor,
+            background=background
+        )
+    
+    def render_text_with_highlights(self, 
+                                  text: str, 
+                                  duration: float,
+                                  y_position: int = 400,
+                                  fps: int = 30,
+                                  frame_store: Optional['FrameStore'] = None) -> List[np.ndarray]:
+        """Render complete text dengan smooth highlight animation
+        
+        Dengan frame_store, frame ditulis ke disk dan yang dikembalikan
+        StoredFrameSource (bisa di-index/di-iterasi seperti list, memmap).
+        """
+        source = self.create_frame_source(text, duration, y_position, fps)
+        if frame_store is not None:
+            key = SegmentCache.make_key({
+                'text': text, 'duration': duration, 'y_position': y_position, 'fps': fps,
+                'font': TextMeasureCache.font_key(self.font),
+                'video_size': (self.video_width, self.video_height), 'unit': self.unit
+            })
+            return frame_store.get(key) or frame_store.put(key, source)
+        # Copy: frame source boleh me-reuse buffer yang sama antar frame
+        return [frame.copy() for frame in source.iter_frames()]
+
+
+class HighlightFrameSource:
+    """Lazy frame source untuk satu segment - frame dibuat hanya saat diminta"""
+    
+    def __init__(self,
+                 processor: AdvancedHighlightProcessor,
+                 lines: List[List[Dict]],
+                 y_start: int,
+                 highlight_segments: List[Dict],
+                 total_frames: int,
+                 fps: int = 30,
+                 text_layer: Optional[Image.Image] = None,
+                 layout: Optional[CompiledLayout] = None,
+                 compositor: Optional[HighlightCompositor] = None,
+                 background: Optional[np.ndarray] = None):
+        self.processor = processor
+        self.lines = lines
+        self.y_start = y_start
+        self.highlight_segments = highlight_segments
+        self.total_frames = total_frames
+        self.fps = fps
+        self.text_layer = text_layer
+        self.duration = total_frames / float(fps)
+        
+        self.layout = layout
+        self.compositor = compositor
+        self.background = background
+        
+        # State animasi per frame dari timeline - frame dengan state sama identik
+        self.timeline = None
+        if layout is not None:
+            # Geometri highlight semua frame dihitung sebelum render dalam satu pass vektor
+            self.timeline = HighlightTimeline.from_layout(layout, total_frames)
+            self.frame_states = self.timeline.chars.tolist()
+            self.frame_widths = self.timeline.widths
+        else:
+            self.frame_states = [
+                processor.highlight_chars_at(i, total_frames, highlight_segments)
+                for i in range(total_frames)
+            ]
+            self.frame_widths = None
+        self.frames_rendered = 0
+        self.render_seconds = 0.0
+        
+        # Cache frame terakhir per state - static run tidak di-render ulang
+        self._last_state = None
+        self._last_frame = None
+    
+    def get_frame(self, frame_idx: int) -> np.ndarray:
+        """Render frame ke-frame_idx"""
+        frame_idx = max(0, min(self.total_frames - 1, frame_idx))
+        state = self.frame_states[frame_idx]
+        if state != self._last_state:
+            render_start = time.perf_counter()
+            if self.layout is not None and self.compositor is not None:
+                self._last_frame = self.compositor.render(self.layout, self.frame_widths[frame_idx])
+            elif self.layout is not None:
+                self._last_frame = self.processor.render_compiled_frame(
+                    self.layout, self.frame_widths[frame_idx], text_layer=self.text_layer,
+                    background=self.background
+                )
+            else:
+                self._last_frame = self.processor.render_frame_with_highlights(
+                    self.lines, self.y_start, frame_idx, self.total_frames,
+                    self.highlight_segments, text_layer=self.text_layer,
+                    background=self.background
+                )
+            self._last_state = state
+            self.frames_rendered += 1
+            self.render_seconds += time.perf_counter() - render_start
+        return self._last_frame
+    
+    def iter_spans(self, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[np.ndarray, int]]:
+        """Yield (frame, repeat) untuk frame [start, end) - setiap static run di-render sekali lalu di-hold"""
+        end = self.total_frames if end is None else min(end, self.total_frames)
+        if self.timeline is not None:
+            for run_start, run_end in self.timeline.static_runs(start, end):
+                yield self.get_frame(run_start), run_end - run_start
+            return
+        
+        frame_idx = start
+        while frame_idx < end:
+            run_end = frame_idx + 1
+            while run_end < end and self.frame_states[run_end] == self.frame_states[frame_idx]:
+                run_end += 1
+            yield self.get_frame(frame_idx), run_end - frame_idx
+            frame_idx = run_end
+    
+    @property
+    def frames_skipped(self) -> int:
+        return max(0, self.total_frames - self.frames_rendered)
+    
+    def make_frame(self, t: float) -> np.ndarray:
+        """Time-indexed make_frame untuk moviepy VideoClip"""
+        # Epsilon kecil supaya t = i/fps tidak jatuh ke frame sebelumnya
+        return self.get_frame(int(t * self.fps + 1e-6))
+    
+    def iter_frames(self) -> Iterator[np.ndarray]:
+        """Generator frame berurutan"""
+        for frame_idx in range(self.total_frames):
+            yield self.get_frame(frame_idx)
+    
+    def to_clip(self) -> 'VideoClip':
+        """Satu VideoClip yang di-backing oleh make_frame"""
+        from moviepy.editor import VideoClip
+        clip = VideoClip(self.make_frame, duration=self.duration)
+        clip.fps = self.fps
+        return clip
+
+
+class StaticFrameSource:
+    """Frame source untuk konten statis (basic text, separator hitam)"""
+    
+    def __init__(self, frame: np.ndarray, duration: float, fps: int = 30):
+        self.frame = frame
+        self.fps = fps
+        self.total_frames = int(fps * duration)
+        self.duration = self.total_frames / float(fps)
+        self.frames_rendered = 1
+        self.render_seconds = 0.0
+    
+    def get_frame(self, frame_idx: int) -> np.ndarray:
+        return self.frame
+    
+    def iter_spans(self) -> Iterator[Tuple[np.ndarray, int]]:
+        yield self.frame, self.total_frames
+    
+    @property
+    def frames_skipped(self) -> int:
+        return max(0, self.total_frames - self.frames_rendered)
+    
+    def make_frame(self, t: float) -> np.ndarray:
+        return self.frame
+    
+    def iter_frames(self) -> Iterator[np.ndarray]:
+        for _ in range(self.total_frames):
+            yield self.frame
+    
+    def to_clip(self) -> 'ImageClip':
+        from moviepy.editor import ImageClip
+        return ImageClip(self.frame, duration=self.duration)
+
+
+def scale_frame(frame: np.ndarray, scale: float) -> np.ndarray:
+    """Downscale frame (ukuran dibulatkan ke genap supaya aman untuk yuv420p)"""
+    if scale == 1.0:
+        return frame
+    height, width = frame.shape[:2]
+    size = (max(2, int(round(width * scale / 2)) * 2), max(2, int(round(height * scale / 2)) * 2))
+    image = Image.fromarray(frame)
+    factor = int(round(1.0 / scale))
+    if abs(factor * scale - 1.0) < 1e-6 and (width // factor, height // factor) == size:
+        # Skala 1/n: box reduce jauh lebih cepat dari resize
+        return np.array(image.reduce(factor))
+    return np.array(image.resize(size, Image.BILINEAR))
+
+
+class PreviewFrameSource:
+    """Draft preview: frame source final di-resample ke fps rendah lalu di-downscale
+    
+    Layout dan rasterisasi teks tetap di skala final, jadi line break dan
+    posisi highlight identik dengan render final; hanya frame yang dikirim
+    ke encoder yang dikecilkan.
+    """
+    
+    def __init__(self, source, scale: float = 0.5, fps: int = 10):
+        self.source = source
+        self.scale = scale
+        self.fps = fps
+        self.total_frames = max(1, int(round(source.duration * fps)))
+        self.duration = self.total_frames / float(fps)
+        
+        # Frame preview ke-j = frame source pada waktu j / fps
+        self.frame_map = [min(source.total_frames - 1, int(j * source.fps / fps))
+                          for j in range(self.total_frames)]
+        states = getattr(source, 'frame_states', None)
+        self.frame_states = [states[i] for i in self.frame_map] if states else [0] * self.total_frames
+        self.frames_rendered = 0
+        self.render_seconds = 0.0
+        
+        self._last_state = None
+        self._last_frame = None
+    
+    def get_frame(self, frame_idx: int) -> np.ndarray:
+        frame_idx = max(0, min(self.total_frames - 1, frame_idx))
+        state = self.frame_states[frame_idx]
+        if self._last_frame is None or state != self._last_state:
+            render_start = time.perf_counter()
+            self._last_frame = scale_frame(self.source.get_frame(self.frame_map[frame_idx]), self.scale)
+            self._last_state = state
+            self.frames_rendered += 1
+            self.render_seconds += time.perf_counter() - render_start
+        return self._last_frame
+    
+    def iter_spans(self) -> Iterator[Tuple[np.ndarray, int]]:
+        frame_idx = 0
+        while frame_idx < self.total_frames:
+            run_end = frame_idx + 1
+            while run_end < self.total_frames and self.frame_states[run_end] == self.frame_states[frame_idx]:
+                run_end += 1
+            yield self.get_frame(frame_idx), run_end - frame_idx
+            frame_idx = run_end
+    
+    @property
+    def frames_skipped(self) -> int:
+        return max(0, self.total_frames - self.frames_rendered)
+    
+    def make_frame(self, t: float) -> np.ndarray:
+        return self.get_frame(int(t * self.fps + 1e-6))
+    
+    def iter_frames(self) -> Iterator[np.ndarray]:
+        for frame_idx in range(self.total_frames):
+            yield self.get_frame(frame_idx)
+    
+    def key_frame_indices(self, count: int = 3) -> List[int]:
+        """Frame awal tiap state animasi, diambil merata (awal, tengah, akhir)"""
+        starts = [i for i in range(self.total_frames)
+                  if i == 0 or self.frame_states[i] != self.frame_states[i - 1]]
+        if len(starts) <= count:
+            return starts
+        picks = np.linspace(0, len(starts) - 1, count).round().astype(int)
+        return [starts[i] for i in picks]
+    
+    def to_clip(self) -> 'VideoClip':
+        from moviepy.editor import VideoClip
+        clip = VideoClip(self.make_frame, duration=self.duration)
+        clip.fps = self.fps
+        return clip
+
+
+def render_contact_sheet(sources: List[PreviewFrameSource],
+                         columns: int = 3,
+                         padding: int = 8,
+                         bg_color: Tuple[int, int, int] = (40, 40, 40)) -> Image.Image:
+    """Contact sheet PNG: satu baris per segment, key frame animasi per kolom"""
+    rows = [[source.get_frame(i).copy() for i in source.key_frame_indices(columns)] for source in sources]
+    cell_height, cell_width = rows[0][0].shape[:2]
+    sheet = Image.new("RGB", (padding + columns * (cell_width + padding),
+                              padding + len(rows) * (cell_height + padding)), bg_color)
+    for row_idx, frames in enumerate(rows):
+        for col_idx, frame in enumerate(frames):
+            sheet.paste(Image.fromarray(frame), (padding + col_idx * (cell_width + padding),
+                                                 padding + row_idx * (cell_height + padding)))
+    return sheet
+
+
+class SceneComposer:
+    """Scene berlapis: background -> overlay PNG -> title card -> subtitle -> body
+    
+    Layer yang tidak berubah (background + overlay, title card) di-rasterize
+    sekali dan di-cache; per frame hanya body animasi yang di-render di atas
+    base_layer, jadi layout bermerek tidak lebih mahal dari layout polos.
+    """
+    
+    def __init__(self,
+                 video_size: Tuple[int, int],
+                 bg_color: Tuple[int, int, int],
+                 text_color: Tuple[int, int, int],
+                 overlay_path: Optional[str] = None,
+                 title_font=None,
+                 subtitle_font=None,
+                 subtitle_color: Optional[Tuple[int, int, int]] = None,
+                 margin_left: int = 70,
+                 margin_right: int = 90):
+        self.video_width, self.video_height = video_size
+        self.bg_color = bg_color
+        self.text_color = text_color
+        self.overlay_path = overlay_path
+        self.title_font = title_font
+        self.subtitle_font = subtitle_font
+        self.subtitle_color = subtitle_color or text_color
+        self.margin_left = margin_left
+        self.margin_right = margin_right
+        
+        self._base_layer = None
+        self._title_cards = {}
+        # mtime overlay saat base layer dibuat - overlay yang diganti memicu rebuild
+        self.overlay_mtime = self.file_mtime(overlay_path)
+    
+    @staticmethod
+    def file_mtime(path: Optional[str]) -> Optional[float]:
+        return os.path.getmtime(path) if path and os.path.exists(path) else None
+    
+    def is_stale(self) -> bool:
+        return self.file_mtime(self.overlay_path) != self.overlay_mtime
+    
+    def clear_title_cards(self):
+        self._title_cards.clear()
+    
+    def overlay_layer(self) -> Optional[Image.Image]:
+        """Overlay PNG (RGBA) di-scale ke ukuran video; None jika tidak ada"""
+        if not self.overlay_path or not os.path.exists(self.overlay_path):
+            return None
+        overlay = Image.open(self.overlay_path).convert("RGBA")
+        if overlay.size != (self.video_width, self.video_height):
+            overlay = overlay.resize((self.video_width, self.video_height), Image.LANCZOS)
+        return overlay
+    
+    def base_layer(self) -> np.ndarray:
+        """Background + overlay - layer statis di bawah body, dibuat sekali"""
+        if self._base_layer is None:
+            frame = Image.new("RGBA", (self.video_width, self.video_height), self.bg_color + (255,))
+            overlay = self.overlay_layer()
+            if overlay is not None:
+                frame.alpha_composite(overlay)
+            self._base_layer = np.array(frame.convert("RGB"))
+        return self._base_layer
+    
+    def _wrap(self, text: str, font) -> List[str]:
+        """Word wrap sederhana ke lebar area teks, line break dari file dipertahankan"""
+        max_width = self.video_width - self.margin_left - self.margin_right
+        lines = []
+        for paragraph in text.split('\n'):
+            current = ""
+            for word in paragraph.split():
+                candidate = f"{current} {word}" if current else word
+                if current and TEXT_MEASURE_CACHE.get_length(font, candidate) > max_width:
+                    lines.append(current)
+                    current = word
+                else:
+                    current = candidate
+            if current:
+                lines.append(current)
+        return lines
+    
+    def title_card(self, title: str, subtitle: str = "") -> np.ndarray:
+        """Title card statis: base layer + judul + subjudul, di tengah secara vertikal"""
+        key = (title, subtitle)
+        card = self._title_cards.get(key)
+        if card is not None:
+            return card
+        
+        title_lines = self._wrap(title, self.title_font) if title else []
+        subtitle_lines = self._wrap(subtitle, self.subtitle_font) if subtitle else []
+        title_height = int(getattr(self.title_font, 'size', 54) * 1.2)
+        subtitle_height = int(getattr(self.subtitle_font, 'size', 28) * 1.3)
+        gap = subtitle_height if title_lines and subtitle_lines else 0
+        block_height = len(title_lines) * title_height + gap + len(subtitle_lines) * subtitle_height
+        
+        frame = Image.fromarray(self.base_layer())
+        draw = ImageDraw.Draw(frame)
+        y = (self.video_height - block_height) // 2
+        for line in title_lines:
+            draw.text((self.margin_left, y), line, font=self.title_font, fill=self.text_color)
+            y += title_height
+        y += gap
+        for line in subtitle_lines:
+            draw.text((self.margin_left, y), line, font=self.subtitle_font, fill=self.subtitle_color)
+            y += subtitle_height
+        
+        card = self._title_cards[key] = np.array(frame)
+        return card
+
+
+def get_ffmpeg_exe() -> Optional[str]:
+    """Cari binary ffmpeg - bundled imageio-ffmpeg dulu, lalu PATH"""
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return shutil.which("ffmpeg")
+
+
+class EncoderSettings:
+    """Parameter encoding yang dipakai semua encoder backend"""
+    
+    def __init__(self,
+                 codec: str = "libx264",
+                 preset: str = "medium",
+                 crf: int = 23,
+                 threads: int = 0,
+                 pixel_format: str = "yuv420p",
+                 fps: int = 30):
+        self.codec = codec
+        self.preset = preset
+        self.crf = crf
+        self.threads = threads
+        self.pixel_format = pixel_format
+        self.fps = fps
+    
+    def ffmpeg_output_args(self) -> List[str]:
+        """Argumen output ffmpeg untuk codec/preset/crf/threads/pix_fmt"""
+        return [
+            "-vcodec", self.codec,
+            "-preset", self.preset,
+            "-crf", str(self.crf),
+            "-threads", str(self.threads),
+            "-pix_fmt", self.pixel_format,
+        ]
+
+
+class OutputProfile:
+    """Satu rendition output: ukuran frame + suffix nama file
+    
+    Rendition dengan aspect berbeda dari master di-fit: 'crop' di-scale sampai
+    menutupi frame lalu di-crop di tengah, 'pad' di-scale sampai muat lalu
+    di-letterbox (seluruh frame master terlihat: teks body dan overlay utuh).
+    """
+    
+    def __init__(self, name: str, size: Tuple[int, int], suffix: str = "", fit: str = "crop"):
+        self.name = name
+        self.size = size
+        self.suffix = suffix
+        self.fit = fit
+    
+    def output_path(self, output_file: str) -> str:
+        """<base>_enhanced.mp4 -> <base>_enhanced<suffix>.mp4"""
+        root, ext = os.path.splitext(output_file)
+        return f"{root}{self.suffix}{ext}"
+    
+    def min_master_width(self, design_size: Tuple[int, int]) -> float:
+        """Lebar master minimum (aspect design_size) supaya rendition ini tidak di-upscale"""
+        width, height = self.size
+        width_for_height = height * design_size[0] / design_size[1]
+        return max(width, width_for_height) if self.fit == "crop" else min(width, width_for_height)
+    
+    def ffmpeg_filter(self, master_size: Tuple[int, int]) -> Optional[str]:
+        """Filter scale + crop/pad dari master, None jika ukurannya sama"""
+        if tuple(self.size) == tuple(master_size):
+            return None
+        width, height = self.size
+        if self.fit == "pad":
+            return (f"scale={width}:{height}:force_original_aspect_ratio=decrease:flags=lanczos,"
+                    f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:color=black")
+        return (f"scale={width}:{height}:force_original_aspect_ratio=increase:flags=lanczos,"
+                f"crop={width}:{height}")
+
+
+# Rendition yang kita publish; template memilih lewat "outputs"
+OUTPUT_PROFILES = {
+    '720p': OutputProfile('720p', (720, 1280)),
+    '1080p': OutputProfile('1080p', (1080, 1920), '_1080p'),
+    # Letterbox, bukan crop: body text boleh turun sampai text_bottom dan overlay
+    # punya branding di atas/bawah - crop tengah 9:16 memotong keduanya
+    'square': OutputProfile('square', (1080, 1080), '_square', fit='pad'),
+}
+
+
+def partial_output_file(output_file: str) -> str:
+    """Path sementara selama encode: .<name>.partial.mp4 (tidak cocok dengan *_enhanced.mp4)"""
+    directory, name = os.path.split(output_file)
+    root, ext = os.path.splitext(name)
+    return os.path.join(directory, f".{root}.partial{ext}")
+
+
+def segments_dir_prefix(output_file: str) -> str:
+    """Prefix work dir segment per output - bisa dibersihkan tanpa menyentuh job lain"""
+    name = os.path.basename(output_file)
+    return f"{name if name.startswith('.') else '.' + name}.segments_"
+
+
+def master_render_size(design_size: Tuple[int, int], profiles: List[OutputProfile]) -> Tuple[int, int]:
+    """Resolusi render: aspect dari template, cukup besar untuk semua rendition tanpa upscale"""
+    design_width, design_height = design_size
+    if not profiles:
+        return design_size
+    width = max(profile.min_master_width(design_size) for profile in profiles)
+    width = int(math.ceil(width / 2)) * 2
+    height = int(round(width * design_height / design_width / 2)) * 2
+    return width, height
+
+
+class FFmpegPipeEncoder:
+    """Tulis raw RGB frames langsung ke stdin ffmpeg - tanpa compositing moviepy
+    
+    Dengan frames_in_flight > 0 render dan encode berjalan bersamaan: thread
+    producer me-render frame ke antrean terbatas, thread encoder menulisnya ke
+    ffmpeg. Antrean penuh = backpressure, jadi memori maksimal frames_in_flight
+    frame walaupun render lebih cepat dari encode.
+    """
+    
+    name = "ffmpeg"
+    
+    def __init__(self, settings: EncoderSettings, frames_in_flight: int = 8):
+        self.settings = settings
+        self.ffmpeg_exe = get_ffmpeg_exe()
+        self.frames_in_flight = frames_in_flight
+        self.assembly_seconds = 0.0
+    
+    def is_available(self) -> bool:
+        return self.ffmpeg_exe is not None
+    
+    def _output_args(self, output_file: str, renditions: Optional[List[OutputProfile]],
+                     master_size: Tuple[int, int], copy_master: bool = False) -> List[str]:
+        """Argumen output: satu file, atau semua rendition sekaligus via split + scale
+        
+        Rendition seukuran master tidak lewat filter (dan di-copy tanpa
+        re-encode jika copy_master).
+        """
+        master_args = ["-c", "copy"] if copy_master else ["-an"] + self.settings.ffmpeg_output_args()
+        if not renditions:
+            return master_args + [output_file]
+        
+        filters = [profile.ffmpeg_filter(master_size) for profile in renditions]
+        scaled = [f for f in filters if f]
+        if not scaled:
+            return [arg for profile in renditions for arg in master_args + [profile.output_path(output_file)]]
+        
+        if len(scaled) == 1:
+            graph = [f"[0:v]{scaled[0]}[r0]"]
+        else:
+            graph = ["[0:v]split=%d%s" % (len(scaled), "".join(f"[s{i}]" for i in range(len(scaled))))]
+            graph += [f"[s{i}]{f}[r{i}]" for i, f in enumerate(scaled)]
+        
+        args = ["-filter_complex", ";".join(graph)]
+        scaled_idx = 0
+        for profile, f in zip(renditions, filters):
+            if f:
+                args += ["-map", f"[r{scaled_idx}]", "-an"] + self.settings.ffmpeg_output_args()
+                scaled_idx += 1
+            else:
+                args += ["-map", "0:v"] + master_args
+            args.append(profile.output_path(output_file))
+        return args
+    
+    def encode(self, sources: List, output_file: str, progress: Optional['FrameProgress'] = None,
+               renditions: Optional[List[OutputProfile]] = None) -> None:
+        """Encode semua frame source berurutan ke satu file video
+        
+        Dengan renditions, satu proses ffmpeg menulis semua rendition
+        (output_file menjadi base path, lihat OutputProfile.output_path).
+        """
+        if not self.is_available():
+            raise RuntimeError("ffmpeg executable not found")
+        if not sources:
+            raise ValueError("No frame sources to encode")
+        
+        height, width = sources[0].get_frame(0).shape[:2]
+        cmd = [
+            self.ffmpeg_exe, "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-vcodec", "rawvideo",
+            "-s", f"{width}x{height}", "-pix_fmt", "rgb24",
+            "-r", str(self.settings.fps), "-i", "-",
+        ] + self._output_args(output_file, renditions, (width, height))
+        
+        # stderr ke file supaya pipe tidak pernah penuh dan memblokir ffmpeg
+        with tempfile.TemporaryFile() as err_log:
+            proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=err_log)
+            try:
+                spans = self._pipelined_spans(sources) if self.frames_in_flight > 0 else self._spans(sources)
+                # Held frame: render sekali, tulis bytes yang sama berulang
+                for data, repeat in spans:
+                    for _ in range(repeat):
+                        proc.stdin.write(data)
+                    if progress is not None:
+                        progress.advance(repeat)
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+            except BaseException:
+                # Render gagal: ffmpeg masih menunggu stdin, jangan sampai wait() menggantung
+                proc.kill()
+                raise
+            finally:
+                return_code = proc.wait()
+            
+            _raise_ffmpeg_error(return_code, err_log)
+    
+    @staticmethod
+    def _spans(sources: List) -> Iterator[Tuple[memoryview, int]]:
+        """(bytes frame, repeat) berurutan - render di thread pemanggil"""
+        for source in sources:
+            for frame, repeat in source.iter_spans():
+                yield np.ascontiguousarray(frame, dtype=np.uint8).data, repeat
+    
+    def _pipelined_spans(self, sources: List) -> Iterator[Tuple[bytes, int]]:
+        """Sama dengan _spans, tapi render berjalan di thread producer
+        
+        Frame di-copy ke bytes sebelum masuk antrean karena source boleh
+        me-reuse buffer yang sama untuk frame berikutnya.
+        """
+        frames = queue.Queue(maxsize=self.frames_in_flight)
+        stop = threading.Event()
+        done = object()
+        
+        def put(item) -> bool:
+            # Timeout supaya producer berhenti jika consumer sudah berhenti
+            while not stop.is_set():
+                try:
+                    frames.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def produce():
+            try:
+                for source in sources:
+                    for frame, repeat in source.iter_spans():
+                        if not put((np.ascontiguousarray(frame, dtype=np.uint8).tobytes(), repeat)):
+                            return
+                put(done)
+            except BaseException as e:
+                put(e)
+        
+        producer = threading.Thread(target=produce, name="frame-producer", daemon=True)
+        producer.start()
+        try:
+            while True:
+                item = frames.get()
+                if item is done:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            producer.join()
+    
+    def concat(self, segment_files: List[str], output_file: str,
+               renditions: Optional[List[OutputProfile]] = None,
+               master_size: Optional[Tuple[int, int]] = None) -> None:
+        """Gabungkan file segment dengan concat demuxer - tanpa re-encode
+        
+        Semua segment harus di-encode dengan EncoderSettings yang sama.
+        Rendition selain ukuran master di-scale dan di-encode di proses
+        ffmpeg yang sama.
+        """
+        if not self.is_available():
+            raise RuntimeError("ffmpeg executable not found")
+        
+        list_dir = os.path.dirname(os.path.abspath(segment_files[0]))
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", dir=list_dir,
+                                         delete=False, encoding="utf-8") as list_file:
+            for segment_file in segment_files:
+                escaped = os.path.abspath(segment_file).replace("'", "'\\''")
+                list_file.write(f"file '{escaped}'\n")
+        
+        cmd = [
+            self.ffmpeg_exe, "-y", "-loglevel", "error",
+            "-f", "concat", "-safe", "0", "-i", list_file.name,
+        ] + self._output_args(output_file, renditions, master_size, copy_master=True)
+        try:
+            with tempfile.TemporaryFile() as err_log:
+                return_code = subprocess.call(cmd, stderr=err_log)
+                _raise_ffmpeg_error(return_code, err_log)
+        finally:
+            os.remove(list_file.name)
+
+
+class SegmentCache:
+    """Content-addressed cache file segment ter-encode, dengan LRU eviction by size
+    
+    Key = hash semua input yang mempengaruhi pixel/bitstream segment.
+    File yang dipakai di-touch (mtime) sehingga eviction membuang yang
+    paling lama tidak dipakai.
+    """
+    
+    VERSION = 2  # Naikkan jika output renderer berubah
+    
+    def __init__(self, cache_dir: str, max_bytes: int = 2 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+    
+    @classmethod
+    def make_key(cls, inputs: Dict) -> str:
+        payload = json.dumps({'version': cls.VERSION, 'inputs': inputs},
+                             sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.mp4")
+    
+    def get(self, key: str) -> Optional[str]:
+        """Path file ter-cache, atau None (miss)"""
+        path = self.path_for(key)
+        if os.path.exists(path):
+            os.utime(path)  # LRU: tandai baru dipakai
+            self.hits += 1
+            return path
+        self.misses += 1
+        return None
+    
+    def put(self, key: str, source_file: str) -> str:
+        """Pindahkan file hasil render ke cache (atomic), return path cache"""
+        path = self.path_for(key)
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=self.cache_dir)
+        os.close(fd)
+        shutil.move(source_file, tmp_path)
+        os.replace(tmp_path, path)
+        return path
+    
+    def remove(self, key: str):
+        try:
+            os.remove(self.path_for(key))
+        except FileNotFoundError:
+            pass
+    
+    def evict(self) -> int:
+        """Hapus file paling lama tidak dipakai sampai total <= max_bytes"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".mp4"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+    
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+    
+    def report(self) -> str:
+        return f"{self.hits}/{self.hits + self.misses} hits ({self.hit_rate() * 100:.0f}%)"
+
+
+class FrameStore:
+    """Frame ter-render di disk (satu file raw per segment), dibaca balik lewat np.memmap
+
+    Hanya frame pertama setiap static run yang ditulis; repeat disimpan di
+    file .json. File .json ditulis terakhir (atomic), jadi ia sekaligus
+    penanda segment selesai - job yang crash bisa resume dan hanya me-render
+    segment yang belum ada.
+
+    Memori dibatasi memory_budget bytes: mapping yang terbuka di-LRU (halaman
+    mapping yang keluar di-drop), dan halaman yang sudah dikirim ke encoder
+    di-drop (madvise) saat iterasi.
+
+    Setiap segment di-render ke store dulu lalu di-encode dari memmap. Di
+    path ffmpeg per segment, file ter-encode juga disimpan di encoded_dir
+    begitu segment selesai (frame mentahnya lalu dihapus), sehingga resume
+    melewati render dan encode. Dengan --encoder moviepy resume dari frame
+    mentah saja: render dilewati, encode tetap diulang.
+    """
+
+    def __init__(self, store_dir: str, memory_budget: int = 256 * 1024 ** 2):
+        self.store_dir = store_dir
+        self.memory_budget = memory_budget
+        self.hits = 0
+        self.misses = 0
+        self.bytes_written = 0
+        self._maps = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(store_dir, exist_ok=True)
+
+    @property
+    def encoded_dir(self) -> str:
+        return os.path.join(self.store_dir, "encoded")
+
+    def frames_path(self, key: str) -> str:
+        return os.path.join(self.store_dir, f"{key}.frames")
+
+    def meta_path(self, key: str) -> str:
+        return os.path.join(self.store_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional['StoredFrameSource']:
+        """Segment yang sudah selesai ditulis, atau None"""
+        try:
+            with open(self.meta_path(key), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.misses += 1
+            return None
+        if not os.path.exists(self.frames_path(key)):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return StoredFrameSource(self, key, meta)
+
+    def put(self, key: str, source) -> 'StoredFrameSource':
+        """Render source (sekali per static run) ke disk, return source yang membaca dari disk"""
+        repeats = []
+        shape = None
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=self.store_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for frame, repeat in source.iter_spans():
+                    frame = np.ascontiguousarray(frame, dtype=np.uint8)
+                    shape = frame.shape
+                    f.write(frame.data)
+                    repeats.append(repeat)
+            os.replace(tmp_path, self.frames_path(key))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+        meta = {'shape': list(shape), 'repeats': repeats, 'fps': source.fps}
+        tmp_meta = self.meta_path(key) + ".tmp"
+        with open(tmp_meta, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_meta, self.meta_path(key))
+        self.bytes_written += len(repeats) * int(np.prod(shape))
+        return StoredFrameSource(self, key, meta, source.frames_rendered, source.render_seconds)
+
+    def open(self, key: str, shape: Tuple[int, ...]) -> np.memmap:
+        """Read-only memmap (frames, h, w, 3) untuk key; mapping lama dilepas jika lewat budget"""
+        with self._lock:
+            frames = self._maps.get(key)
+            if frames is not None:
+                self._maps.move_to_end(key)
+                return frames
+            frames = np.memmap(self.frames_path(key), dtype=np.uint8, mode="r", shape=tuple(shape))
+            self._maps[key] = frames
+            mapped = sum(m.nbytes for m in self._maps.values())
+            while mapped > self.memory_budget and len(self._maps) > 1:
+                _, evicted = self._maps.popitem(last=False)
+                mapped -= evicted.nbytes
+                # munmap menunggu view terakhir hilang (encoder mungkin masih memakai),
+                # tapi halaman resident bisa langsung dilepas - dibaca ulang dari disk jika perlu
+                self.drop_pages(evicted, evicted.nbytes)
+            return frames
+
+    @staticmethod
+    def drop_pages(frames: np.memmap, end: int):
+        """Lepas halaman [0, end) bytes dari RAM; data tetap di disk"""
+        mapping = getattr(frames, '_mmap', None)
+        if mapping is None or not hasattr(mmap, 'MADV_DONTNEED'):
+            return
+        end -= end % mmap.PAGESIZE
+        if end > 0:
+            mapping.madvise(mmap.MADV_DONTNEED, 0, end)
+
+    def remove(self, key: str):
+        with self._lock:
+            frames = self._maps.pop(key, None)
+        if frames is not None:
+            self.drop_pages(frames, frames.nbytes)
+        for path in (self.meta_path(key), self.frames_path(key)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+class StoredFrameSource:
+    """Frame source dari FrameStore - frame adalah view memmap (zero-copy ke encoder)
+
+    Juga bisa dipakai seperti list frame (len, index, iterasi) sebagai
+    pengganti List[np.ndarray] yang tidak muat di RAM.
+    """
+
+    def __init__(self, store: FrameStore, key: str, meta: Dict,
+                 frames_rendered: int = 0, render_seconds: float = 0.0):
+        self.store = store
+        self.key = key
+        self.repeats = meta['repeats']
+        self.shape = (len(self.repeats),) + tuple(meta['shape'])
+        self.fps = meta['fps']
+        self.total_frames = sum(self.repeats)
+        self.duration = self.total_frames / float(self.fps)
+        # Statistik render di job ini (0 jika segment di-resume dari store)
+        self.frames_rendered = frames_rendered
+        self.render_seconds = render_seconds
+
+        # Frame ke-i ada di span bisect_right(_ends, i)
+        self._ends = np.cumsum(self.repeats).tolist()
+
+    def frames(self) -> np.memmap:
+        return self.store.open(self.key, self.shape)
+
+    def get_frame(self, frame_idx: int) -> np.ndarray:
+        frame_idx = max(0, min(self.total_frames - 1, frame_idx))
+        return self.frames()[bisect.bisect_right(self._ends, frame_idx)]
+
+    def iter_spans(self) -> Iterator[Tuple[np.ndarray, int]]:
+        frames = self.frames()
+        frame_bytes = int(np.prod(self.shape[1:]))
+        released = 0
+        for span_idx, repeat in enumerate(self.repeats):
+            # Frame sebelumnya sudah ditulis ke encoder - halamannya boleh dilepas
+            consumed = span_idx * frame_bytes
+            if consumed - released > self.store.memory_budget:
+                FrameStore.drop_pages(frames, consumed)
+                released = consumed
+            yield frames[span_idx], repeat
+
+    @property
+    def frames_skipped(self) -> int:
+        return max(0, self.total_frames - self.frames_rendered)
+
+    def make_frame(self, t: float) -> np.ndarray:
+        return self.get_frame(int(t * self.fps + 1e-6))
+
+    def iter_frames(self) -> Iterator[np.ndarray]:
+        for frame, repeat in self.iter_spans():
+            for _ in range(repeat):
+                yield frame
+
+    def __len__(self) -> int:
+        return self.total_frames
+
+    def __getitem__(self, frame_idx: int) -> np.ndarray:
+        if frame_idx < 0:
+            frame_idx += self.total_frames
+        if not 0 <= frame_idx < self.total_frames:
+            raise IndexError(frame_idx)
+        return self.get_frame(frame_idx)
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        return self.iter_frames()
+
+    def to_clip(self) -> 'VideoClip':
+        from moviepy.editor import VideoClip
+        clip = VideoClip(self.make_frame, duration=self.duration)
+        clip.fps = self.fps
+        return clip
+
+
+_FILE_HASHES = {}
+
+
+def file_sha256(path: str) -> str:
+    """Hash isi file (di-memo per path + mtime + size)"""
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_mtime, stat.st_size)
+    if memo_key not in _FILE_HASHES:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        _FILE_HASHES[memo_key] = digest.hexdigest()
+    return _FILE_HASHES[memo_key]
+
+
+def _raise_ffmpeg_error(return_code: int, err_log) -> None:
+    """Raise RuntimeError dengan baris pertama stderr ffmpeg jika gagal"""
+    if return_code == 0:
+        return
+    err_log.seek(0)
+    message = err_log.read().decode("utf-8", errors="replace").strip()
+    message = message.splitlines()[0] if message else "no output"
+    raise RuntimeError(f"ffmpeg exited with code {return_code}: {message}")
+
+
+class MoviePyEncoder:
+    """Fallback encoder - concatenate clips lalu write_videofile"""
+    
+    name = "moviepy"
+    
+    def __init__(self, settings: EncoderSettings):
+        self.settings = settings
+        self.assembly_seconds = 0.0
+    
+    def is_available(self) -> bool:
+        return True
+    
+    def encode(self, sources: List, output_file: str, progress: Optional['FrameProgress'] = None,
+               renditions: Optional[List[OutputProfile]] = None) -> None:
+        """Tulis master dengan moviepy; rendition lain di-transcode ffmpeg dari master"""
+        from moviepy.editor import concatenate_videoclips
+        
+        master_file = output_file
+        scaled = []
+        if renditions:
+            height, width = sources[0].get_frame(0).shape[:2]
+            masters = [p for p in renditions if p.ffmpeg_filter((width, height)) is None]
+            scaled = [p for p in renditions if p not in masters]
+            master_file = (masters[0].output_path(output_file) if masters
+                           else os.path.splitext(output_file)[0] + ".master.mp4")
+        
+        assembly_start = time.perf_counter()
+        clips = [source.to_clip() for source in sources]
+        final_video = concatenate_videoclips(clips, method="compose")
+        self.assembly_seconds = time.perf_counter() - assembly_start
+        final_video.write_videofile(
+            master_file,
+            fps=self.settings.fps,
+            codec=self.settings.codec,
+            preset=self.settings.preset,
+            threads=self.settings.threads or None,
+            ffmpeg_params=["-crf", str(self.settings.crf),
+                           "-pix_fmt", self.settings.pixel_format],
+            audio=False,
+            verbose=False,
+            logger=None
+        )
+        if progress is not None:
+            # write_videofile tidak punya hook per frame - progress dilaporkan sekaligus
+            progress.advance(sum(source.total_frames for source in sources))
+        
+        if scaled:
+            try:
+                FFmpegPipeEncoder(self.settings).concat([master_file], output_file, scaled, (width, height))
+            finally:
+                if not masters:
+                    os.remove(master_file)
+
+
+ENCODER_BACKENDS = {
+    FFmpegPipeEncoder.name: FFmpegPipeEncoder,
+    MoviePyEncoder.name: MoviePyEncoder,
+}
+
+
+class ProgressReporter:
+    """Antrean event progress thread-safe: render thread hanya post, UI/CLI yang drain
+    
+    Log line masuk antrean FIFO. Snapshot progress frame di-coalesce (hanya
+    yang terbaru disimpan), jadi post tidak pernah blok dan tidak menumpuk
+    walaupun tidak ada yang men-drain.
+    """
+    
+    def __init__(self):
+        self._events = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._progress = None
+    
+    def log(self, message: str):
+        self._events.put(('log', message))
+    
+    def post(self, kind: str, payload=None):
+        """Event kontrol (mis. 'done') untuk consumer di UI thread"""
+        self._events.put((kind, payload))
+    
+    def update(self, snapshot: Dict):
+        with self._lock:
+            self._progress = snapshot
+    
+    def drain(self, max_events: int = 200) -> Tuple[List[Tuple[str, object]], Optional[Dict]]:
+        """Ambil maksimal max_events event + snapshot progress terbaru (None jika tidak berubah)"""
+        events = []
+        while len(events) < max_events:
+            try:
+                events.append(self._events.get_nowait())
+            except queue.Empty:
+                break
+        with self._lock:
+            snapshot, self._progress = self._progress, None
+        return events, snapshot
+    
+    def start_console(self, interval: float = 2.0, print_fn: Callable[[str], None] = print) -> threading.Event:
+        """Thread CLI: cetak snapshot progress paling sering setiap interval detik
+        
+        Return Event; set() untuk menghentikan thread.
+        """
+        stop = threading.Event()
+        
+        def run():
+            while not stop.wait(interval):
+                _, snapshot = self.drain(max_events=0)
+                if snapshot is not None:
+                    print_fn(format_progress(snapshot))
+        
+        threading.Thread(target=run, name="progress-console", daemon=True).start()
+        return stop
+
+
+class FrameProgress:
+    """Progress frame + segment satu job dengan ETA, di-post ke ProgressReporter
+    
+    segment_ends: frame akhir kumulatif setiap segment (serial encode);
+    tanpa itu segment dihitung lewat segment_done() (render paralel).
+    """
+    
+    def __init__(self,
+                 reporter: ProgressReporter,
+                 job_name: str,
+                 frames_total: int,
+                 segments_total: int,
+                 segment_ends: Optional[List[int]] = None,
+                 min_interval: float = 0.1):
+        self.reporter = reporter
+        self.job_name = job_name
+        self.frames_total = max(1, frames_total)
+        self.segments_total = segments_total
+        self.segment_ends = segment_ends
+        self.min_interval = min_interval
+        self.frames_done = 0
+        self.segments_done = 0
+        self._start = time.perf_counter()
+        self._posted_at = 0.0
+    
+    def advance(self, frames: int):
+        self.frames_done = min(self.frames_total, self.frames_done + frames)
+        if self.segment_ends is not None:
+            self.segments_done = bisect.bisect_right(self.segment_ends, self.frames_done)
+        now = time.perf_counter()
+        # Throttle: snapshot baru paling sering setiap min_interval
+        if now - self._posted_at >= self.min_interval or self.frames_done >= self.frames_total:
+            self._posted_at = now
+            self.reporter.update(self.snapshot(now))
+    
+    def segment_done(self, frames: int = 0):
+        self.segments_done += 1
+        self._posted_at = 0.0
+        self.advance(frames)
+    
+    def snapshot(self, now: Optional[float] = None) -> Dict:
+        elapsed = (now or time.perf_counter()) - self._start
+        eta = None
+        if self.frames_done:
+            eta = elapsed * (self.frames_total - self.frames_done) / self.frames_done
+        return {
+            'job': self.job_name,
+            'frames_done': self.frames_done,
+            'frames_total': self.frames_total,
+            'percent': 100.0 * self.frames_done / self.frames_total,
+            'segments_done': self.segments_done,
+            'segments_total': self.segments_total,
+            'elapsed': elapsed,
+            'eta': eta
+        }
+
+
+def format_progress(snapshot: Dict) -> str:
+    """Satu baris progress untuk label GUI / console"""
+    eta = snapshot['eta']
+    eta_text = f"{int(eta) // 60}:{int(eta) % 60:02d}" if eta is not None else "--:--"
+    return (f"   ⏳ {snapshot['job']}: {snapshot['percent']:.1f}% · "
+            f"segment {snapshot['segments_done']}/{snapshot['segments_total']} · "
+            f"{snapshot['frames_done']}/{snapshot['frames_total']} frames · ETA {eta_text}")
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak RSS process ini atau child-nya (ffmpeg) dalam MB; None jika tidak tersedia"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # Linux melaporkan KB, macOS bytes
+    scale = 1024.0 * 1024.0 if sys.platform == "darwin" else 1024.0
+    return round(max(own, children) / scale, 1)
+
+
+class JobMetrics:
+    """Metrics terstruktur per job dan per segment, di-emit sebagai JSON lines
+    
+    Setiap record satu baris JSON dengan field 'event' ('segment' / 'job'),
+    siap di-ingest dashboard. Tanpa metrics_file tidak ada yang ditulis,
+    tapi durasi stage tetap dikumpulkan untuk log.
+    """
+    
+    _write_lock = threading.Lock()
+    
+    def __init__(self, job_name: str, metrics_file: Optional[str] = None):
+        self.job_name = job_name
+        self.metrics_file = metrics_file
+        self.stages = OrderedDict()
+        self.segments = []
+        self._start = time.perf_counter()
+    
+    @contextmanager
+    def stage(self, name: str):
+        """Context manager: tambahkan durasi blok ke stage name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage_time(name, time.perf_counter() - start)
+    
+    def add_stage_time(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+    
+    def record_segment(self, **fields):
+        self.segments.append(fields)
+        self.emit('segment', **fields)
+    
+    def emit(self, event: str, **fields):
+        if not self.metrics_file:
+            return
+        record = {
+            'event': event,
+            'job': self.job_name,
+            'pid': os.getpid(),
+            'timestamp': round(time.time(), 3)
+        }
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._write_lock:
+            with open(self.metrics_file, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+    
+    def finish(self, success: bool, output_file: Optional[str] = None,
+               frames_total: int = 0, frames_skipped: int = 0) -> Dict:
+        """Emit record 'job' dan return isinya"""
+        wall = time.perf_counter() - self._start
+        frames_rendered = frames_total - frames_skipped
+        render_seconds = self.stages.get('render', 0.0)
+        record = {
+            'success': success,
+            'wall_sec': round(wall, 4),
+            'stages': {name: round(seconds, 4) for name, seconds in self.stages.items()},
+            'segments': len(self.segments),
+            'frames_total': frames_total,
+            'frames_rendered': frames_rendered,
+            'frames_per_sec': round(frames_total / wall, 2) if wall else 0.0,
+            'render_frames_per_sec': round(frames_rendered / render_seconds, 2) if render_seconds else None,
+            'bytes_written': os.path.getsize(output_file) if output_file and os.path.exists(output_file) else 0,
+            'peak_rss_mb': peak_rss_mb()
+        }
+        self.emit('job', **record)
+        return record
+    
+    def summary_line(self) -> str:
+        return " | ".join(f"{name} {seconds:.2f}s" for name, seconds in self.stages.items())
+
+
+# Default font paths (flat structure)
+FONT_FILES = [
+    "DMSerifDisplay-Regular.ttf",
+    "Poppins-Bold.ttf",
+    "ProximaNova-Regular.ttf",
+    "ProximaNova-Bold.ttf"
+]
+
+# Ukuran per font type, sama seperti setup_fonts original
+FONT_SIZES = {
+    'title': 54,
+    'subtitle': 28,
+    'content': 34
+}
+
+
+class FontRegistry:
+    """Process-wide registry font dan highlight processor, semuanya lazy
+    
+    FreeType face baru dibuka saat (family, size) pertama kali diminta,
+    lalu dipakai bersama oleh semua VideoGenerator di process yang sama.
+    Worker process bisa di-warm lewat warm() sebagai pool initializer.
+    """
+    
+    def __init__(self, font_files: List[str]):
+        self.font_files = font_files
+        self._fonts = {}
+        self._processors = {}
+        self._lock = threading.Lock()
+    
+    def families(self) -> List[str]:
+        """Nama family yang file-nya tersedia (tanpa membuka font)"""
+        families = [font_file.split('.')[0] for font_file in self.font_files if os.path.exists(font_file)]
+        return families or ['default']
+    
+    def font_path(self, family: str) -> Optional[str]:
+        for font_file in self.font_files:
+            if font_file.split('.')[0] == family:
+                return font_file
+        return None
+    
+    def get_font(self, family: str, size: int):
+        """FreeType font untuk (family, size) - ukuran bebas, dimuat saat pertama diminta"""
+        key = (family, size)
+        with self._lock:
+            font = self._fonts.get(key)
+            if font is None:
+                font_path = self.font_path(family)
+                try:
+                    if font_path is None:
+                        raise OSError(f"unknown font family '{family}'")
+                    font = ImageFont.truetype(font_path, size)
+                except Exception as e:
+                    if family != 'default':
+                        print(f"Warning: Could not load {font_path or family}: {e}")
+                    font = ImageFont.load_default()
+                self._fonts[key] = font
+            return font
+    
+    def get_processor(self, family: str, size: int, **processor_options) -> AdvancedHighlightProcessor:
+        """AdvancedHighlightProcessor bersama untuk (family, size, options)"""
+        key = (family, size, tuple(sorted(processor_options.items())))
+        processor = self._processors.get(key)
+        if processor is None:
+            processor = AdvancedHighlightProcessor(font=self.get_font(family, size), **processor_options)
+            with self._lock:
+                processor = self._processors.setdefault(key, processor)
+        return processor
+    
+    def warm(self, specs: List[Tuple[str, int]]):
+        """Pre-load (family, size) - dipakai sebagai initializer worker pool"""
+        for family, size in specs:
+            self.get_font(family, size)
+
+
+class LazyFontFamily(Mapping):
+    """{font_type: font} read-only yang membuka font dari registry saat diakses"""
+    
+    def __init__(self, registry: FontRegistry, family: str):
+        self.registry = registry
+        self.family = family
+    
+    def __getitem__(self, font_type: str):
+        return self.registry.get_font(self.family, FONT_SIZES[font_type])
+    
+    def __iter__(self):
+        return iter(FONT_SIZES)
+    
+    def __len__(self):
+        return len(FONT_SIZES)
+
+
+FONT_REGISTRY = FontRegistry(FONT_FILES)
+
+
+def _warm_font_registry(specs: List[Tuple[str, int]]):
+    """Pool initializer: muat font yang dibutuhkan worker sekali di awal"""
+    FONT_REGISTRY.warm(specs)
 
 
 def run_headless_test():
@@ -318,6 +2388,32 @@ def run_headless_test():
         # Test duration calculation
         print("📝 Testing duration calculation...")
         
+        # Paragraf panjang tanpa highlight: setiap kata harus muncul di salah satu halaman
+        print("📝 Testing auto-fit pagination...")
+        generator = VideoGenerator(headless=True)
+        sentence = "Pemerintah menargetkan produksi mobil listrik naik tajam tahun depan."
+        paragraph = " ".join(f"{sentence[:-1]} bagian {i}." for i in range(16))
+        pages = generator.paginate_segments([paragraph])
+        assert len(pages) > 1, "paragraf panjang seharusnya dipecah"
+        page_words = []
+        for page in pages:
+            assert not generator.has_highlights(page)
+            size = generator.segment_font_size(page)
+            assert generator.fits(page, size), f"halaman overflow: {page[:40]}..."
+            processor = generator.get_highlight_processor(font_type='content', size=size)
+            lines = processor.smart_wrap_with_highlights(page)
+            assert all(processor.margin_left + sum(processor._get_text_width(w['word'] + " ") for w in line)
+                       <= processor.video_width for line in lines), "baris keluar layar"
+            page_words += [w['word'] for line in lines for w in line]
+            
+            frame = generator.create_segment_source(page, 3.0).get_frame(0)
+            background = generator.scene_background()
+            rows = np.nonzero((frame != background).any(axis=(1, 2)))[0]
+            assert len(rows) and rows[-1] - rows[0] >= (len(lines) - 1) * processor.line_height, \
+                "teks halaman tidak di-wrap"
+        assert page_words == paragraph.split(), "ada kata yang hilang"
+        print(f"   {len(paragraph.split())} words on {len(pages)} pages ✅")
+        
         print("✅ Core functionality test passed!")
         print("🎬 Enhanced features ready for local GUI usage!")
         return True
@@ -326,30 +2422,117 @@ def run_headless_test():
         print(f"⚠️ Test error: {e}")
         return False
 
+
+def default_templates() -> Dict[str, Dict]:
+    """Template bawaan - dipakai VideoGenerator dan validasi --template di CLI"""
+    templates = {
+        "default": {
+            # Ukuran desain: layout (margin, posisi, font) dalam unit 720 px lebar
+            "video_size": (720, 1280),
+            "bg_color": (0, 0, 0),
+            "text_color": (255, 255, 255),
+            "fps": 30,
+            # Scene layers: overlay PNG bermerek + warna subjudul di title card
+            "overlay": "semangat.png",
+            "subtitle_color": HighlightStyle.YELLOW_HIGHLIGHT,
+            # Rendition (OUTPUT_PROFILES) - render sekali di resolusi terbesar
+            "outputs": ["720p"],
+            # Auto-fit: font content boleh turun sampai min_font_size supaya
+            # teks berhenti sebelum text_bottom (di atas footer overlay)
+            "min_font_size": 24,
+            "text_bottom": 1120
+        }
+    }
+    # Semua rendition publish: 720p, 1080x1920 dan square (letterbox)
+    templates["publish"] = dict(templates["default"], outputs=["720p", "1080p", "square"])
+    return templates
+
+
 class VideoGenerator:
-    def __init__(self):
-        # Original initialization code tetap sama
+    def __init__(self, headless: bool = False):
+        # Font dan processor lazy dari FONT_REGISTRY - dimuat saat pertama dipakai
         self.setup_fonts()
         self.setup_templates()
         
-        # Enhanced: Initialize highlight processors
+        # Encoder backend: ffmpeg pipe, fallback ke moviepy
+        self.encoder_backend = "ffmpeg"
+        self.encoder_settings = EncoderSettings(fps=self.templates["default"]["fps"])
+        # Frame di antrean render -> encode (0 = render dan encode bergantian di satu thread).
+        # Dengan satu core tidak ada yang bisa di-overlap, pipeline hanya menambah copy
+        self.frames_in_flight = 8 if (os.cpu_count() or 1) > 1 else 0
+        # Text layer backend: 'atlas' (GLYPH_ATLAS, pixel-identik) atau 'pillow'
+        self.text_backend = 'atlas'
+        # Daftar nama OUTPUT_PROFILES (None = "outputs" dari template)
+        self.output_profiles = None
+        
+        # Statistik render untuk job summary
+        self.render_stats = {'frames_total': 0, 'frames_skipped': 0}
+        
+        # Parallel per-segment rendering (1 = serial, satu pass encoding)
+        self.segment_workers = 1
+        
+        # On-disk cache segment ter-encode (None = nonaktif)
+        self.segment_cache_dir = None
+        self.segment_cache_max_bytes = 2 * 1024 ** 3
+        self._segment_cache = None
+        
+        # Frame store di disk (None = frame langsung ke encoder); segment yang selesai
+        # (ter-encode jika ada ffmpeg, selain itu frame mentah) disimpan sampai job
+        # sukses, jadi job yang crash bisa resume
+        self.frame_store_dir = None
+        self.frame_store_budget_bytes = 256 * 1024 ** 2
+        self._frame_store = None
+        
+        # Auto-fit font size + pagination segment yang tidak muat di layar
+        self.auto_fit = True
+        self._fit_cache = OrderedDict()
+        
+        # Scene berlapis (overlay + title card Judul/Subjudul); False = layout polos lama
+        self.scene_enabled = True
+        self._scenes = {}
+        
+        # Instrumentation: JSON lines metrics dan opt-in cProfile per job
+        self.metrics_file = None
+        self.profile_dir = None
+        self.job_metrics = JobMetrics("idle")
+        
+        # Batch mode untuk process_files: jumlah file paralel, timeout (detik) dan retry per file
+        self.batch_workers = 1
+        self.file_timeout = None
+        self.file_retries = 0
+        
+        # Enhanced: highlight processors dibuat lazy (lihat get_highlight_processor)
         self.highlight_processors = {}
-        self._initialize_highlight_system()
+        
+        # Template untuk mode tanpa GUI (GUI memakai selected_template)
+        self.template_name = "default"
+        self.selected_template = None
+        self.input_dir = "."
+        self.output_dir = "."
+        self.processing = False
+        
+        # Event progress: render thread post, GUI (root.after) / CLI thread yang drain
+        self.progress = ProgressReporter()
+        
+        if headless:
+            self.root = None
+            return
         
         # GUI setup - with error handling for headless environment
         try:
+            _load_tkinter()
             self.root = tk.Tk()
             self.root.title("Enhanced Video Generator with Advanced Highlights")
             self.root.geometry("500x600")
             
-            self.setup_gui()
-            
-            # Variables
+            # Variables - harus ada sebelum setup_gui memakainya
             self.input_folder = tk.StringVar()
             self.output_folder = tk.StringVar()
             self.selected_template = tk.StringVar(value="default")
             self.processing = False
             
+            self.setup_gui()
+            
         except Exception as e:
             if "display" in str(e).lower():
                 print("🤖 GUI not available - running in headless mode")
@@ -358,62 +2541,160 @@ class VideoGenerator:
                 raise
     
     def setup_fonts(self):
-        """Setup fonts - tetap sama seperti original"""
-        self.fonts = {}
-        
-        # Default font paths (flat structure)
-        font_files = [
-            "DMSerifDisplay-Regular.ttf",
-            "Poppins-Bold.ttf", 
-            "ProximaNova-Regular.ttf",
-            "ProximaNova-Bold.ttf"
-        ]
+        """Setup fonts - family yang tersedia, font dimuat lazy dari FONT_REGISTRY
         
-        # Load fonts dengan fallback
-        for font_file in font_files:
-            if os.path.exists(font_file):
-                try:
-                    base_name = font_file.split('.')[0]
-                    self.fonts[base_name] = {
-                        'title': ImageFont.truetype(font_file, 54),
-                        'subtitle': ImageFont.truetype(font_file, 28),
-                        'content': ImageFont.truetype(font_file, 34)
-                    }
-                except Exception as e:
-                    print(f"Warning: Could not load {font_file}: {e}")
-        
-        # Fallback jika tidak ada fonts
-        if not self.fonts:
-            default_font = ImageFont.load_default()
-            self.fonts['default'] = {
-                'title': default_font,
-                'subtitle': default_font,
-                'content': default_font
-            }
+        self.fonts[family][font_type] tetap bekerja seperti original; face
+        FreeType baru dibuka saat pertama kali diakses.
+        """
+        self.fonts = {
+            family: LazyFontFamily(FONT_REGISTRY, family)
+            for family in FONT_REGISTRY.families()
+        }
     
     def setup_templates(self):
         """Setup templates - existing logic"""
-        self.templates = {
-            "default": {
-                "video_size": (720, 1280),
-                "bg_color": (0, 0, 0),
-                "text_color": (255, 255, 255),
-                "fps": 30
-            }
+        self.templates = default_templates()
+    
+    def get_template_name(self) -> str:
+        """Nama template aktif - dari GUI jika ada, selain itu template_name"""
+        if self.selected_template is not None:
+            return self.selected_template.get()
+        return self.template_name
+    
+    def get_input_dir(self) -> str:
+        """Input folder - dari GUI jika ada, selain itu input_dir"""
+        if hasattr(self, 'input_folder'):
+            return self.input_folder.get()
+        return self.input_dir
+    
+    def get_output_dir(self) -> str:
+        """Output folder - dari GUI jika ada, selain itu output_dir"""
+        if hasattr(self, 'output_folder'):
+            return self.output_folder.get()
+        return self.output_dir
+    
+    def get_job_options(self) -> Dict:
+        """Setting render yang perlu dibawa ke worker process"""
+        return {
+            'template': self.get_template_name(),
+            'output_dir': self.get_output_dir(),
+            'encoder_backend': self.encoder_backend,
+            'encoder_settings': dict(vars(self.encoder_settings)),
+            'segment_workers': self.segment_workers,
+            'segment_cache_dir': self.segment_cache_dir,
+            'segment_cache_max_bytes': self.segment_cache_max_bytes,
+            'frame_store_dir': self.frame_store_dir,
+            'frame_store_budget_bytes': self.frame_store_budget_bytes,
+            'metrics_file': self.metrics_file,
+            'profile_dir': self.profile_dir,
+            'scene_enabled': self.scene_enabled,
+            'auto_fit': self.auto_fit,
+            'frames_in_flight': self.frames_in_flight,
+            'text_backend': self.text_backend,
+            'output_profiles': self.output_profiles
         }
     
-    def _initialize_highlight_system(self):
-        """Initialize highlight processors untuk setiap font"""
-        for font_family, font_dict in self.fonts.items():
-            self.highlight_processors[font_family] = {}
-            for font_type, font in font_dict.items():
-                self.highlight_processors[font_family][font_type] = AdvancedHighlightProcessor(
-                    font=font,
-                    video_width=720,
-                    video_height=1280,
-                    bg_color=(0, 0, 0),
-                    text_color=(255, 255, 255)
-                )
+    def apply_job_options(self, options: Dict):
+        """Kebalikan get_job_options - dipakai di worker process"""
+        self.template_name = options['template']
+        self.output_dir = options['output_dir']
+        self.encoder_backend = options['encoder_backend']
+        self.encoder_settings = EncoderSettings(**options['encoder_settings'])
+        self.segment_workers = options['segment_workers']
+        self.segment_cache_dir = options['segment_cache_dir']
+        self.segment_cache_max_bytes = options['segment_cache_max_bytes']
+        self.frame_store_dir = options.get('frame_store_dir')
+        self.frame_store_budget_bytes = options.get('frame_store_budget_bytes', self.frame_store_budget_bytes)
+        self.metrics_file = options['metrics_file']
+        self.profile_dir = options['profile_dir']
+        self.scene_enabled = options['scene_enabled']
+        self.auto_fit = options.get('auto_fit', True)
+        self.frames_in_flight = options['frames_in_flight']
+        self.text_backend = options.get('text_backend', 'atlas')
+        self.output_profiles = options.get('output_profiles')
+    
+    def get_output_profiles(self) -> List[OutputProfile]:
+        """Rendition aktif: override output_profiles atau "outputs" dari template"""
+        template = self.templates[self.get_template_name()]
+        names = self.output_profiles or template.get("outputs") or []
+        return [OUTPUT_PROFILES[name] for name in names]
+    
+    def get_render_size(self) -> Tuple[int, int]:
+        """Ukuran frame yang di-render (master), cukup untuk semua rendition"""
+        template = self.templates[self.get_template_name()]
+        return master_render_size(template["video_size"], self.get_output_profiles())
+    
+    def layout_scale(self) -> float:
+        """Pixel master per unit layout (lebar video_size template)"""
+        return self.get_render_size()[0] / self.templates[self.get_template_name()]["video_size"][0]
+    
+    def rendition_files(self, output_file: str) -> List[str]:
+        """Path file setiap rendition untuk base output_file"""
+        profiles = self.get_output_profiles()
+        return [profile.output_path(output_file) for profile in profiles] or [output_file]
+    
+    def layout_px(self, value: float) -> int:
+        """Unit layout -> pixel di resolusi master"""
+        return int(round(value * self.layout_scale()))
+    
+    def get_highlight_processor(self, font_family: Optional[str] = None,
+                                font_type: str = 'content',
+                                size: Optional[int] = None) -> AdvancedHighlightProcessor:
+        """Ambil processor bersama dari FONT_REGISTRY (size bebas, default dari font_type)
+        
+        Size dan margin dalam unit layout, di-scale ke resolusi master.
+        """
+        if font_family is None:
+            font_family = list(self.fonts.keys())[0]  # Use first available font
+        if size is None:
+            size = FONT_SIZES[font_type]
+        
+        video_width, video_height = self.get_render_size()
+        processor = FONT_REGISTRY.get_processor(
+            font_family, self.layout_px(size),
+            video_width=video_width,
+            video_height=video_height,
+            margin_left=self.layout_px(70),
+            margin_right=self.layout_px(90),
+            unit=self.layout_scale(),
+            bg_color=(0, 0, 0),
+            text_color=(255, 255, 255),
+            text_backend=self.text_backend
+        )
+        if size == FONT_SIZES.get(font_type):
+            self.highlight_processors.setdefault(font_family, {})[font_type] = processor
+        return processor
+    
+    def get_scene(self) -> Optional[SceneComposer]:
+        """SceneComposer untuk template aktif (None jika scene nonaktif)
+        
+        Di-cache supaya base layer dan title card di-rasterize sekali.
+        """
+        if not self.scene_enabled:
+            return None
+        template_name = self.get_template_name()
+        render_size = self.get_render_size()
+        scene = self._scenes.get((template_name, render_size))
+        if scene is None or scene.is_stale():
+            template = self.templates[template_name]
+            font_family = list(self.fonts.keys())[0]
+            scene = self._scenes[(template_name, render_size)] = SceneComposer(
+                video_size=render_size,
+                bg_color=template["bg_color"],
+                text_color=template["text_color"],
+                overlay_path=template.get("overlay"),
+                title_font=FONT_REGISTRY.get_font(font_family, self.layout_px(FONT_SIZES['title'])),
+                subtitle_font=FONT_REGISTRY.get_font(font_family, self.layout_px(FONT_SIZES['subtitle'])),
+                subtitle_color=template.get("subtitle_color"),
+                margin_left=self.layout_px(70),
+                margin_right=self.layout_px(90)
+            )
+        return scene
+    
+    def scene_background(self) -> Optional[np.ndarray]:
+        """Layer statis (background + overlay) di bawah body, None tanpa scene"""
+        scene = self.get_scene()
+        return scene.base_layer() if scene is not None else None
 
 
     def setup_gui(self):
@@ -472,6 +2753,7 @@ class VideoGenerator:
 • [[warning:text]] - Yellow highlight for warnings
 • [[fast:text]] - Quick animation
 • [[slow:text]] - Slow animation
+• [[smooth:text]] - Eased (ease-in-out) animation
 • [[text]] - Default blue highlight"""
         
         tk.Label(styles_frame, text=styles_text, font=("Arial", 9), 
@@ -494,6 +2776,27 @@ class VideoGenerator:
         scrollbar.pack(side="right", fill="y")
         self.progress_text.config(yscrollcommand=scrollbar.set)
         scrollbar.config(command=self.progress_text.yview)
+        
+        # Progress frame/segment + ETA
+        self.progress_label = tk.Label(self.root, text="", font=("Arial", 9), fg="gray")
+        self.progress_label.pack(pady=(0, 10))
+        
+        # Event dari render thread di-drain di main thread, maksimal 10x per detik
+        self.root.after(100, self.drain_progress)
+    
+    def drain_progress(self):
+        """Pindahkan event progress ke widget Tk - hanya dipanggil dari main thread"""
+        events, snapshot = self.progress.drain()
+        lines = [payload for kind, payload in events if kind == 'log']
+        if lines:
+            self.progress_text.insert(tk.END, "\n".join(lines) + "\n")
+            self.progress_text.see(tk.END)
+        if snapshot is not None:
+            self.progress_label.config(text=format_progress(snapshot).strip())
+        if any(kind == 'done' for kind, _ in events):
+            self.processing = False
+            self.process_button.config(state="normal", text="🎬 Generate Videos with Highlights")
+        self.root.after(100, self.drain_progress)
     
     def select_input_folder(self):
         folder = filedialog.askdirectory()
@@ -506,11 +2809,9 @@ class VideoGenerator:
             self.output_folder.set(folder)
     
     def log_progress(self, message):
-        """Log progress to GUI"""
+        """Log progress - GUI: lewat antrean (tidak pernah menunggu repaint), CLI: print"""
         if self.root and hasattr(self, 'progress_text'):
-            self.progress_text.insert(tk.END, f"{message}\n")
-            self.progress_text.see(tk.END)
-            self.root.update()
+            self.progress.log(message)
         else:
             print(message)
     
@@ -531,121 +2832,732 @@ class VideoGenerator:
         return max(3.0, min(10.0, duration))
 
 
-    def create_highlighted_clip(self, text: str, duration: float, y_position: int = 400) -> ImageClip:
-        """Create clip dengan advanced highlighting"""
+    def create_highlighted_source(self, text: str, duration: float, y_position: int = 400,
+                                  background: Optional[np.ndarray] = None,
+                                  font_size: Optional[int] = None) -> HighlightFrameSource:
+        """Create lazy frame source dengan advanced highlighting"""
         
         # Get appropriate font and processor
-        font_family = list(self.fonts.keys())[0]  # Use first available font
-        processor = self.highlight_processors[font_family]['content']
+        processor = self.get_highlight_processor(font_type='content', size=font_size)
         
-        # Generate frames dengan highlights
-        frames = processor.render_text_with_highlights(
+        return processor.create_frame_source(
             text=text,
             duration=duration,
-            y_position=y_position,
-            fps=30
+            y_position=self.layout_px(y_position),
+            fps=self.templates[self.get_template_name()]["fps"],
+            background=background
         )
-        
-        # Convert frames ke ImageClip
-        clips = []
-        for frame in frames:
-            clip = ImageClip(frame, duration=1.0/30)
-            clips.append(clip)
-        
-        return concatenate_videoclips(clips, method="compose")
     
-    def create_basic_clip(self, text: str, duration: float, y_position: int = 400) -> ImageClip:
+    def create_highlighted_clip(self, text: str, duration: float, y_position: int = 400) -> 'VideoClip':
+        """Create clip dengan advanced highlighting"""
+        # Frame di-render lazy oleh satu VideoClip, bukan list ImageClip per frame
+        return self.create_highlighted_source(text, duration, y_position).to_clip()
+    
+    def create_basic_clip(self, text: str, duration: float, y_position: int = 400) -> 'ImageClip':
         """Create basic clip tanpa highlights - fallback method"""
+        return self.create_basic_source(text, duration, y_position).to_clip()
+    
+    def create_basic_source(self, text: str, duration: float, y_position: int = 400,
+                            background: Optional[np.ndarray] = None,
+                            font_size: Optional[int] = None) -> StaticFrameSource:
+        """Create static frame source tanpa highlights
         
-        # Simple implementation untuk compatibility
-        template = self.templates[self.selected_template.get()]
-        video_size = template["video_size"]
-        bg_color = template["bg_color"]
-        text_color = template["text_color"]
-        
-        # Create simple frame
-        frame = Image.new("RGB", video_size, bg_color)
-        draw = ImageDraw.Draw(frame)
-        
-        # Get font
-        font_family = list(self.fonts.keys())[0]
-        font = self.fonts[font_family]['content']
+        Layout sama dengan path highlight (word wrap processor), jadi
+        auto-fit dan pagination juga berlaku untuk segment tanpa markup.
+        """
+        template = self.templates[self.get_template_name()]
+        processor = self.get_highlight_processor(font_type='content', size=font_size)
         
-        # Draw text (simple implementation)
-        try:
-            draw.text((70, y_position), text, font=font, fill=text_color)
-        except:
-            draw.text((70, y_position), text, fill=text_color)
+        lines = processor.smart_wrap_with_highlights(text)
+        text_layer = processor.render_text_layer(lines, self.layout_px(y_position))
+        frame = processor.new_frame(background)
+        frame.paste(template["text_color"], mask=text_layer)
         
-        return ImageClip(np.array(frame), duration=duration)
+        return StaticFrameSource(np.array(frame), duration, fps=template["fps"])
     
     def process_text_file(self, file_path: str) -> bool:
         """Process single text file dengan highlight support"""
+        if not self.profile_dir:
+            return self._process_text_file(file_path)
+        
+        # Opt-in cProfile untuk satu job
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            return self._process_text_file(file_path)
+        finally:
+            profiler.disable()
+            os.makedirs(self.profile_dir, exist_ok=True)
+            base_name = os.path.splitext(os.path.basename(file_path))[0]
+            profile_file = os.path.join(self.profile_dir, f"{base_name}.prof")
+            profiler.dump_stats(profile_file)
+            self.log_progress(f"   🔬 Profile saved: {profile_file}")
+    
+    def _process_text_file(self, file_path: str) -> bool:
+        metrics = self.job_metrics = JobMetrics(os.path.basename(file_path), self.metrics_file)
+        output_file = None
         try:
             self.log_progress(f"📝 Processing: {os.path.basename(file_path)}")
             
             # Read file
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read().strip()
+            with metrics.stage('read'):
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    content = f.read().strip()
             
             if not content:
                 self.log_progress(f"⚠️ Empty file: {file_path}")
+                metrics.finish(False)
                 return False
             
-            # Split into segments
-            segments = self.split_content(content)
-            self.log_progress(f"   Found {len(segments)} segments")
-            
-            # Generate clips
-            all_clips = []
-            
-            for i, segment in enumerate(segments, 1):
-                self.log_progress(f"   Processing segment {i}/{len(segments)}")
-                
-                # Calculate duration
-                duration = self.calculate_smart_duration(segment)
-                
-                # Create clip dengan atau tanpa highlights
-                if self.has_highlights(segment):
-                    self.log_progress(f"   ✨ Using advanced highlights")
-                    clip = self.create_highlighted_clip(segment, duration, 400)
-                else:
-                    self.log_progress(f"   📝 Using basic rendering")
-                    clip = self.create_basic_clip(segment, duration, 400)
-                
-                all_clips.append(clip)
-                
-                # Add separator except last segment
-                if i < len(segments):
-                    black_frame = np.zeros((1280, 720, 3), dtype=np.uint8)
-                    separator = ImageClip(black_frame, duration=0.5)
-                    all_clips.append(separator)
+            # Split into segments - blok Judul/Subjudul jadi title card jika scene aktif
+            with metrics.stage('split'):
+                # Base layer scene tetap warm antar job (worker service); title card per job
+                for scene in self._scenes.values():
+                    scene.clear_title_cards()
+                header = None
+                if self.scene_enabled:
+                    header, content = self.split_scene_header(content)
+                segments = self.split_content(content)
+            self.log_progress(f"   Found {len(segments)} segments" + (" + title card" if header else ""))
             
-            # Combine clips
-            self.log_progress("   🎬 Combining clips...")
-            final_video = concatenate_videoclips(all_clips, method="compose")
+            # Segment yang tidak muat walau di min_font_size dipecah jadi beberapa layar
+            if self.auto_fit:
+                with metrics.stage('fit'):
+                    pages = self.paginate_segments(segments)
+                if len(pages) > len(segments):
+                    self.log_progress(f"   📄 Paginated overflowing text: {len(segments)} -> {len(pages)} screens")
+                segments = pages
             
             # Generate output filename
             base_name = os.path.splitext(os.path.basename(file_path))[0]
-            output_file = os.path.join(self.output_folder.get() if hasattr(self, 'output_folder') else '.', f"{base_name}_enhanced.mp4")
-            
-            # Write video
-            self.log_progress("   🎥 Encoding video...")
-            final_video.write_videofile(
-                output_file,
-                fps=30,
-                codec='libx264',
-                audio=False,
-                verbose=False,
-                logger=None
-            )
+            output_file = os.path.join(self.get_output_dir(), f"{base_name}_enhanced.mp4")
+            
+            # Encode ke file .partial dulu; nama final hanya muncul jika encode selesai
+            partial_file = partial_output_file(output_file)
+            parallel = self.segment_workers > 1 and len(segments) > 1
+            per_segment = parallel or self.segment_cache_dir or self.frame_store_dir
+            if per_segment and self.encoder_backend == FFmpegPipeEncoder.name and get_ffmpeg_exe():
+                # Render + encode per segment (paralel, dari cache dan/atau resume), lalu concat tanpa re-encode
+                if parallel:
+                    self.log_progress(f"   ⚡ Rendering segments in parallel ({self.segment_workers} workers)")
+                frames_total, frames_skipped = self.render_segments_to_files(segments, partial_file, header)
+            else:
+                frames_total, frames_skipped = self.render_segments_serial(segments, partial_file, header)
+            for partial, final in zip(self.rendition_files(partial_file), self.rendition_files(output_file)):
+                os.replace(partial, final)
+            
+            # Static runs yang di-hold, tidak di-render ulang
+            self.render_stats['frames_total'] += frames_total
+            self.render_stats['frames_skipped'] += frames_skipped
+            self.log_progress(f"   ⏭️ Held {frames_skipped}/{frames_total} static frames (not re-rendered)")
             
-            self.log_progress(f"✅ Success: {base_name}_enhanced.mp4")
+            rendition_files = self.rendition_files(output_file)
+            metrics.finish(True, rendition_files[0], frames_total, frames_skipped)
+            self.log_progress(f"   ⏱️ {metrics.summary_line()}")
+            self.log_progress(f"✅ Success: {', '.join(os.path.basename(f) for f in rendition_files)}")
             return True
             
         except Exception as e:
+            metrics.finish(False, output_file)
             self.log_progress(f"❌ Error processing {file_path}: {str(e)}")
             return False
+        
+        finally:
+            if output_file is not None:
+                self.remove_partial_outputs(output_file)
+    
+    def remove_partial_outputs(self, output_file: str):
+        """Hapus sisa file .partial dan work dir segment (encode gagal, timeout atau crash)"""
+        partial_file = partial_output_file(output_file)
+        for partial in self.rendition_files(partial_file):
+            try:
+                os.remove(partial)
+            except FileNotFoundError:
+                pass
+        output_dir = os.path.dirname(os.path.abspath(partial_file))
+        prefix = segments_dir_prefix(partial_file)
+        for name in os.listdir(output_dir) if os.path.isdir(output_dir) else []:
+            if name.startswith(prefix):
+                shutil.rmtree(os.path.join(output_dir, name), ignore_errors=True)
+    
+    def preview_text_file(self, file_path: str, sheet: bool = False,
+                          scale: float = 0.5, fps: int = 10) -> Optional[str]:
+        """Draft preview cepat: video kecil (fps rendah, preset ultrafast) atau contact sheet PNG
+        
+        Layout sama persis dengan render final (create_segment_source di
+        skala penuh); hanya output yang dikecilkan. Return path output.
+        """
+        start = time.perf_counter()
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                content = f.read().strip()
+            if not content:
+                self.log_progress(f"⚠️ Empty file: {file_path}")
+                return None
+            
+            header = None
+            if self.scene_enabled:
+                header, content = self.split_scene_header(content)
+            segments = self.split_content(content)
+            if self.auto_fit:
+                segments = self.paginate_segments(segments)
+            
+            sources = []
+            if header is not None:
+                sources.append(self.create_title_source(header, self.calculate_smart_duration(self.header_text(header))))
+            for segment in segments:
+                sources.append(self.create_segment_source(segment, self.calculate_smart_duration(segment), 400))
+            previews = [PreviewFrameSource(source, scale, fps) for source in sources]
+            
+            base_name = os.path.splitext(os.path.basename(file_path))[0]
+            if sheet:
+                output_file = os.path.join(self.get_output_dir(), f"{base_name}_preview.png")
+                render_contact_sheet(previews).save(output_file, compress_level=1)
+            else:
+                output_file = os.path.join(self.get_output_dir(), f"{base_name}_preview.mp4")
+                separator = PreviewFrameSource(self.create_separator_source(0.5), scale, fps)
+                timeline = []
+                for i, preview in enumerate(previews):
+                    if i > 0:
+                        timeline.append(separator)
+                    timeline.append(preview)
+                settings = EncoderSettings(preset='ultrafast', crf=30, fps=fps,
+                                           pixel_format=self.encoder_settings.pixel_format)
+                encoder = FFmpegPipeEncoder(settings)
+                if not encoder.is_available():
+                    encoder = MoviePyEncoder(settings)
+                encoder.encode(timeline, output_file)
+            
+            self.log_progress(f"👀 Preview ready in {time.perf_counter() - start:.2f}s: {output_file}")
+            return output_file
+        
+        except Exception as e:
+            self.log_progress(f"❌ Error previewing {file_path}: {str(e)}")
+            return None
+    
+    def create_segment_source(self, segment: str, duration: float, y_position: int = 400):
+        """Frame source untuk satu segment, dengan atau tanpa highlights"""
+        background = self.scene_background()
+        font_size = self.segment_font_size(segment, y_position)
+        if self.has_highlights(segment):
+            return self.create_highlighted_source(segment, duration, y_position, background, font_size)
+        return self.create_basic_source(segment, duration, y_position, background, font_size)
+    
+    def segment_font_size(self, segment: str, y_position: int = 400) -> int:
+        """Font size content untuk segment (auto-fit jika aktif)"""
+        if not self.auto_fit:
+            return FONT_SIZES['content']
+        return self.fit_font_size(segment, y_position) or self.fit_limits()[0]
+    
+    def fit_limits(self) -> Tuple[int, int, int]:
+        """(min_size, max_size, text_bottom) dalam unit layout dari template aktif"""
+        template = self.templates[self.get_template_name()]
+        max_size = FONT_SIZES['content']
+        return (min(template.get("min_font_size", max_size), max_size), max_size,
+                template.get("text_bottom", template["video_size"][1]))
+    
+    def fits(self, text: str, size: int, y_position: int = 400) -> bool:
+        """Satu layout pass: apakah text pada size berhenti sebelum text_bottom"""
+        processor = self.get_highlight_processor(font_type='content', size=size)
+        lines = processor.smart_wrap_with_highlights(text)
+        bottom = self.layout_px(y_position) + len(lines) * processor.line_height
+        return bottom <= self.layout_px(self.fit_limits()[2])
+    
+    def fit_font_size(self, text: str, y_position: int = 400) -> Optional[int]:
+        """Size terbesar (min..max) di mana text muat, None jika min pun overflow
+        
+        Binary search: paling banyak ~log2(max - min) + 1 layout pass, dan
+        lebar kata per size sudah ada di TEXT_MEASURE_CACHE.
+        """
+        min_size, max_size, text_bottom = self.fit_limits()
+        key = (text, y_position, min_size, max_size, text_bottom, self.get_render_size())
+        if key in self._fit_cache:
+            self._fit_cache.move_to_end(key)
+            return self._fit_cache[key]
+        
+        if self.fits(text, max_size, y_position):
+            size = max_size
+        elif not self.fits(text, min_size, y_position):
+            size = None
+        else:
+            # Invariant: lo muat, hi tidak
+            lo, hi = min_size, max_size
+            while hi - lo > 1:
+                mid = (lo + hi) // 2
+                if self.fits(text, mid, y_position):
+                    lo = mid
+                else:
+                    hi = mid
+            size = lo
+        
+        self._fit_cache[key] = size
+        if len(self._fit_cache) > 1024:
+            self._fit_cache.popitem(last=False)
+        return size
+    
+    def paginate_segments(self, segments: List[str], y_position: int = 400) -> List[str]:
+        """Pecah segment yang overflow di min_font_size menjadi beberapa layar
+        
+        Baris dibagi rata antar halaman; markup highlight dipertahankan per kata.
+        """
+        pages = []
+        min_size = self.fit_limits()[0]
+        for segment in segments:
+            if self.fit_font_size(segment, y_position) is not None:
+                pages.append(segment)
+                continue
+            
+            processor = self.get_highlight_processor(font_type='content', size=min_size)
+            lines = processor.smart_wrap_with_highlights(segment)
+            bottom = self.layout_px(self.fit_limits()[2])
+            max_lines = max(1, (bottom - self.layout_px(y_position)) // processor.line_height)
+            page_count = -(-len(lines) // max_lines)
+            per_page = -(-len(lines) // page_count)
+            for start in range(0, len(lines), per_page):
+                pages.append(self.join_wrapped_words(lines[start:start + per_page]))
+        return pages
+    
+    @staticmethod
+    def join_wrapped_words(lines: List[List[Dict]]) -> str:
+        """Kebalikan smart_wrap_with_highlights: word dicts -> text dengan markup [[style:...]]"""
+        words = []
+        for line in lines:
+            for word_info in line:
+                word = word_info['word']
+                if word_info['is_highlight']:
+                    style = word_info['style']
+                    word = f"[[{style}:{word}]]" if style else f"[[{word}]]"
+                words.append(word)
+        return " ".join(words)
+    
+    def create_title_source(self, header: Dict, duration: float) -> StaticFrameSource:
+        """Title card Judul/Subjudul - satu frame statis dari SceneComposer"""
+        frame = self.get_scene().title_card(header['title'], header['subtitle'])
+        return StaticFrameSource(frame, duration, fps=self.templates[self.get_template_name()]["fps"])
+    
+    def header_text(self, header: Dict) -> str:
+        return f"{header['title']}\n{header['subtitle']}".strip()
+    
+    def create_separator_source(self, duration: float = 0.5) -> StaticFrameSource:
+        """Black separator di antara segment"""
+        width, height = self.get_render_size()
+        black_frame = np.zeros((height, width, 3), dtype=np.uint8)
+        return StaticFrameSource(black_frame, duration, fps=self.templates[self.get_template_name()]["fps"])
+    
+    def render_segments_serial(self, segments: List[str], output_file: str,
+                               header: Optional[Dict] = None) -> Tuple[int, int]:
+        """Render semua segment berurutan lalu encode dalam satu pass"""
+        metrics = self.job_metrics
+        all_sources = []
+        segment_sources = []
+        store_keys = []
+        
+        if header is not None:
+            self.log_progress("   🎬 Title card")
+            layout_start = time.perf_counter()
+            duration = self.calculate_smart_duration(self.header_text(header))
+            source, key = self.stored_source(
+                {'kind': 'title', 'text': self.header_text(header), 'header': header, 'duration': duration},
+                lambda: self.create_title_source(header, duration)
+            )
+            store_keys.append(key)
+            layout_seconds = time.perf_counter() - layout_start - source.render_seconds
+            metrics.add_stage_time('layout', layout_seconds)
+            all_sources.append(source)
+            segment_sources.append((0, 'title', self.header_text(header), source, layout_seconds))
+            if segments:
+                all_sources.append(self.create_separator_source(0.5))
+        
+        for i, segment in enumerate(segments, 1):
+            self.log_progress(f"   Processing segment {i}/{len(segments)}")
+            
+            # Calculate duration
+            duration = self.calculate_smart_duration(segment)
+            
+            # Create source dengan atau tanpa highlights
+            if self.has_highlights(segment):
+                self.log_progress(f"   ✨ Using advanced highlights")
+            else:
+                self.log_progress(f"   📝 Using basic rendering")
+            layout_start = time.perf_counter()
+            source, key = self.stored_source(
+                {'kind': 'segment', 'text': segment, 'duration': duration, 'y_position': 400},
+                lambda: self.create_segment_source(segment, duration, 400)
+            )
+            store_keys.append(key)
+            # Dengan frame store, render terjadi di sini - waktunya masuk stage render
+            layout_seconds = time.perf_counter() - layout_start - source.render_seconds
+            metrics.add_stage_time('layout', layout_seconds)
+            all_sources.append(source)
+            kind = 'highlight' if self.has_highlights(segment) else 'basic'
+            segment_sources.append((i, kind, segment, source, layout_seconds))
+            
+            # Add separator except last segment
+            if i < len(segments):
+                all_sources.append(self.create_separator_source(0.5))
+        
+        # Progress per frame: separator dihitung ke segment sebelumnya
+        segment_ids = {id(entry[3]) for entry in segment_sources}
+        segment_ends = []
+        frames_so_far = 0
+        for source in all_sources:
+            frames_so_far += source.total_frames
+            if id(source) in segment_ids:
+                segment_ends.append(frames_so_far)
+            elif segment_ends:
+                segment_ends[-1] = frames_so_far
+        progress = FrameProgress(self.progress, metrics.job_name, frames_so_far,
+                                 len(segment_sources), segment_ends)
+        
+        # Write video - frame di-render lazy di dalam encode, jadi waktunya dipisah
+        self.log_progress("   🎥 Encoding video...")
+        # (frame store: sebagian render sudah terjadi sebelum encode)
+        rendered_before = sum(source.render_seconds for source in all_sources)
+        encode_start = time.perf_counter()
+        assembly_seconds = self.encode_video(all_sources, output_file, progress)
+        encode_seconds = time.perf_counter() - encode_start
+        render_seconds = sum(source.render_seconds for source in all_sources)
+        metrics.add_stage_time('render', render_seconds)
+        metrics.add_stage_time('assembly', assembly_seconds)
+        metrics.add_stage_time('encode', max(0.0, encode_seconds - (render_seconds - rendered_before) - assembly_seconds))
+        
+        # Job sukses: frame di store tidak diperlukan lagi untuk resume
+        store = self.get_frame_store()
+        if store is not None:
+            for key in store_keys:
+                store.remove(key)
+        
+        for i, kind, segment, source, layout_seconds in segment_sources:
+            rendered = source.total_frames - source.frames_skipped
+            metrics.record_segment(
+                index=i,
+                kind=kind,
+                chars=len(segment),
+                duration=source.duration,
+                frames_total=source.total_frames,
+                frames_rendered=rendered,
+                layout_sec=round(layout_seconds, 4),
+                render_sec=round(source.render_seconds, 4),
+                render_frames_per_sec=round(rendered / source.render_seconds, 2) if source.render_seconds else None
+            )
+        
+        frames_total = sum(source.total_frames for source in all_sources)
+        frames_skipped = sum(source.frames_skipped for source in all_sources)
+        return frames_total, frames_skipped
+    
+    def get_segment_cache(self) -> Optional[SegmentCache]:
+        """SegmentCache untuk segment_cache_dir aktif (None jika nonaktif)"""
+        if not self.segment_cache_dir:
+            return None
+        cache = self._segment_cache
+        if cache is None or cache.cache_dir != self.segment_cache_dir:
+            cache = self._segment_cache = SegmentCache(self.segment_cache_dir, self.segment_cache_max_bytes)
+        cache.max_bytes = self.segment_cache_max_bytes
+        return cache
+    
+    def get_frame_store(self) -> Optional[FrameStore]:
+        """FrameStore untuk frame_store_dir aktif (None jika nonaktif)"""
+        if not self.frame_store_dir:
+            return None
+        store = self._frame_store
+        if store is None or store.store_dir != self.frame_store_dir:
+            store = self._frame_store = FrameStore(self.frame_store_dir, self.frame_store_budget_bytes)
+        store.memory_budget = self.frame_store_budget_bytes
+        return store
+    
+    def stored_source(self, job: Dict, create: Callable[[], object]) -> Tuple[object, Optional[str]]:
+        """(source, key): dari FrameStore jika segment sudah selesai sebelumnya,
+        selain itu create() lalu di-render ke store. key None tanpa store.
+        """
+        store = self.get_frame_store()
+        if store is None:
+            return create(), None
+        # Frame mentah tidak bergantung pada encoder settings
+        key = self.segment_cache_key(dict(job, template=self.get_template_name(), encoder_settings=None))
+        source = store.get(key)
+        if source is not None:
+            self.log_progress(f"   ♻️ Resumed from frame store ({source.total_frames} frames)")
+            return source, key
+        return store.put(key, create()), key
+    
+    def segment_cache_key(self, job: Dict) -> str:
+        """Hash semua input yang menentukan hasil encode satu segment"""
+        font_size = (self.segment_font_size(job['text'], job.get('y_position', 400))
+                     if job['kind'] == 'segment' else None)
+        font = self.get_highlight_processor(font_type='content', size=font_size).font
+        font_path = getattr(font, 'path', None)
+        scene = self.get_scene()
+        overlay_path = scene.overlay_path if scene is not None else None
+        return SegmentCache.make_key({
+            'kind': job['kind'],
+            'text': job.get('text'),
+            'header': job.get('header'),
+            'scene': scene is not None and job['kind'] != 'separator',
+            'overlay_sha256': (file_sha256(overlay_path)
+                               if overlay_path and os.path.exists(overlay_path) else None),
+            'duration': job['duration'],
+            'y_position': job.get('y_position'),
+            'template': self.templates[job['template']],
+            'render_size': self.get_render_size(),
+            'font': {
+                'sha256': file_sha256(font_path) if font_path else None,
+                'size': getattr(font, 'size', None)
+            },
+            'styles': {name: vars(style) for name, style in HIGHLIGHT_STYLES.items()},
+            'default_style': vars(HighlightStyle()),
+            'encoder_settings': job['encoder_settings']
+        })
+    
+    def render_segments_to_files(self, segments: List[str], output_file: str,
+                                 header: Optional[Dict] = None) -> Tuple[int, int]:
+        """Render + encode setiap segment ke file sendiri, lalu concat
+        
+        Segment yang ada di cache tidak di-render ulang. Dengan
+        segment_workers > 1 segment yang belum ada dirender di process pool.
+        Separator di-encode sekali dan dipakai ulang di concat list.
+        Tanpa cache tapi dengan frame store, segment ter-encode disimpan di
+        frame store sampai job sukses (resume setelah crash).
+        """
+        encoder_settings = dict(vars(self.encoder_settings))
+        output_dir = os.path.dirname(os.path.abspath(output_file))
+        cache = self.get_segment_cache()
+        resume = cache is None and self.get_frame_store() is not None
+        if resume:
+            cache = SegmentCache(self.get_frame_store().encoded_dir)
+        fps = self.encoder_settings.fps
+        
+        with tempfile.TemporaryDirectory(prefix=segments_dir_prefix(output_file), dir=output_dir) as work_dir:
+            jobs = []
+            if header is not None:
+                jobs.append({
+                    'kind': 'title',
+                    'text': self.header_text(header),
+                    'header': header,
+                    'duration': self.calculate_smart_duration(self.header_text(header)),
+                    'template': self.get_template_name(),
+                    'scene': self.scene_enabled,
+                    'auto_fit': self.auto_fit,
+                    'frames_in_flight': self.frames_in_flight,
+                    'text_backend': self.text_backend,
+                    'output_profiles': self.output_profiles,
+                    'frame_store_dir': self.frame_store_dir,
+                    'frame_store_budget_bytes': self.frame_store_budget_bytes,
+                    'encoder_settings': encoder_settings,
+                    'output_file': os.path.join(work_dir, "title.mp4")
+                })
+            for i, segment in enumerate(segments, 1):
+                jobs.append({
+                    'kind': 'segment',
+                    'text': segment,
+                    'duration': self.calculate_smart_duration(segment),
+                    'y_position': 400,
+                    'template': self.get_template_name(),
+                    'scene': self.scene_enabled,
+                    'auto_fit': self.auto_fit,
+                    'frames_in_flight': self.frames_in_flight,
+                    'text_backend': self.text_backend,
+                    'output_profiles': self.output_profiles,
+                    'frame_store_dir': self.frame_store_dir,
+                    'frame_store_budget_bytes': self.frame_store_budget_bytes,
+                    'encoder_settings': encoder_settings,
+                    'output_file': os.path.join(work_dir, f"segment_{i:03d}.mp4")
+                })
+            separator_job = {
+                'kind': 'separator',
+                'duration': 0.5,
+                'template': self.get_template_name(),
+                'scene': self.scene_enabled,
+                'auto_fit': self.auto_fit,
+                'frames_in_flight': self.frames_in_flight,
+                'text_backend': self.text_backend,
+                'output_profiles': self.output_profiles,
+                'encoder_settings': encoder_settings,
+                'output_file': os.path.join(work_dir, "separator.mp4")
+            }
+            all_jobs = jobs + ([separator_job] if len(jobs) > 1 else [])
+            
+            # Progress per segment selesai (urutan selesai bebas di render paralel)
+            separator_uses = len(jobs) - 1
+            progress = FrameProgress(
+                self.progress, self.job_metrics.job_name,
+                sum(int(fps * job['duration']) for job in jobs) + int(fps * separator_job['duration']) * separator_uses,
+                len(jobs)
+            )
+            
+            def report_done(job):
+                frames = int(fps * job['duration'])
+                if job['kind'] == 'separator':
+                    progress.advance(frames * separator_uses)
+                else:
+                    progress.segment_done(frames)
+            
+            # Ambil dari cache dulu; sisanya perlu di-render
+            results = {}
+            pending = []
+            for job in all_jobs:
+                if cache is not None:
+                    job['cache_key'] = self.segment_cache_key(job)
+                    cached_file = cache.get(job['cache_key'])
+                    if cached_file is not None:
+                        frames = int(fps * job['duration'])
+                        results[job['output_file']] = {
+                            'output_file': cached_file,
+                            'frames_total': frames,
+                            'frames_skipped': frames
+                        }
+                        report_done(job)
+                        continue
+                pending.append(job)
+            
+            if resume:
+                self.log_progress(f"   ♻️ Resumed {len(all_jobs) - len(pending)}/{len(all_jobs)} encoded segments from frame store")
+            elif cache is not None:
+                self.log_progress(f"   💾 Segment cache: {len(all_jobs) - len(pending)}/{len(all_jobs)} cached")
+            
+            pending_results = []
+            store = self.get_frame_store()
+            
+            def segment_done(job, result):
+                # Langsung ke cache/frame store: job yang crash di segment berikutnya
+                # tetap menyisakan segment yang sudah selesai untuk resume
+                if cache is not None:
+                    result['output_file'] = cache.put(job['cache_key'], result['output_file'])
+                if store is not None and result.get('store_key'):
+                    store.remove(result['store_key'])
+                results[job['output_file']] = result
+                pending_results.append((job, result))
+                report_done(job)
+                self.log_progress(f"   ✅ Rendered {os.path.basename(job['output_file'])}")
+            
+            segments_start = time.perf_counter()
+            if len(pending) > 1 and self.segment_workers > 1:
+                # Spawn (bukan fork) - aman walaupun thread Tk sedang berjalan
+                workers = min(self.segment_workers, len(pending))
+                font_family = list(self.fonts.keys())[0]
+                with ProcessPoolExecutor(max_workers=workers,
+                                         mp_context=multiprocessing.get_context("spawn"),
+                                         initializer=_warm_font_registry,
+                                         initargs=([(font_family, FONT_SIZES['content'])],)) as pool:
+                    futures = {pool.submit(_render_segment_job, job): job for job in pending}
+                    # Segment lain yang selesai tetap disimpan walaupun ada yang gagal
+                    failures = []
+                    for future in as_completed(futures):
+                        try:
+                            segment_done(futures[future], future.result())
+                        except Exception as e:
+                            failures.append(e)
+                    if failures:
+                        raise failures[0]
+            else:
+                for job in pending:
+                    segment_done(job, _render_segment_job(job, generator=self))
+            
+            metrics = self.job_metrics
+            metrics.add_stage_time('segments_wall', time.perf_counter() - segments_start)
+            for job, result in pending_results:
+                # Waktu per stage dari worker (dijumlah lintas worker)
+                for stage in ('layout', 'render', 'encode'):
+                    metrics.add_stage_time(stage, result[f'{stage}_sec'])
+            
+            for index, job in enumerate(jobs, 0 if header is not None else 1):
+                result = results[job['output_file']]
+                if job['kind'] == 'title':
+                    kind = 'title'
+                else:
+                    kind = 'highlight' if self.has_highlights(job['text']) else 'basic'
+                metrics.record_segment(
+                    index=index,
+                    kind=kind,
+                    chars=len(job['text']),
+                    duration=job['duration'],
+                    frames_total=result['frames_total'],
+                    frames_rendered=result['frames_total'] - result['frames_skipped'],
+                    cached='layout_sec' not in result,
+                    layout_sec=result.get('layout_sec'),
+                    render_sec=result.get('render_sec'),
+                    encode_sec=result.get('encode_sec')
+                )
+            
+            # Urutan concat: segment, separator, segment, ..., segment
+            concat_files = []
+            for i, job in enumerate(jobs):
+                if i > 0:
+                    concat_files.append(results[separator_job['output_file']]['output_file'])
+                concat_files.append(results[job['output_file']]['output_file'])
+            
+            self.log_progress("   🔗 Joining segments (no re-encode)...")
+            with metrics.stage('assembly'):
+                FFmpegPipeEncoder(self.encoder_settings).concat(concat_files, output_file,
+                                                                self.get_output_profiles(),
+                                                                self.get_render_size())
+        
+        if resume:
+            # Job sukses: segment ter-encode tidak diperlukan lagi untuk resume
+            for job in all_jobs:
+                cache.remove(job['cache_key'])
+        elif cache is not None:
+            evicted = cache.evict()
+            self.log_progress(f"   💾 Cache hit rate: {cache.report()}" +
+                              (f", evicted {evicted} file(s)" if evicted else ""))
+        
+        frames_total = sum(results[job['output_file']]['frames_total'] for job in jobs)
+        frames_skipped = sum(results[job['output_file']]['frames_skipped'] for job in jobs)
+        if len(jobs) > 1:
+            # Separator dipakai (len(jobs) - 1) kali tapi di-render paling banyak sekali
+            separator = results[separator_job['output_file']]
+            separator_rendered = separator['frames_total'] - separator['frames_skipped']
+            frames_total += separator['frames_total'] * (len(jobs) - 1)
+            frames_skipped += separator['frames_total'] * (len(jobs) - 1) - separator_rendered
+        return frames_total, frames_skipped
+    
+    def encode_video(self, sources: List, output_file: str,
+                     progress: Optional[FrameProgress] = None) -> float:
+        """Encode frame sources dengan backend terpilih, fallback ke moviepy
+        
+        Semua rendition template ditulis sekaligus (output_file = base path).
+        Return waktu clip assembly (moviepy concatenate) dalam detik.
+        """
+        renditions = self.get_output_profiles()
+        encoder_cls = ENCODER_BACKENDS.get(self.encoder_backend, MoviePyEncoder)
+        encoder = encoder_cls(self.encoder_settings)
+        if encoder.name == FFmpegPipeEncoder.name:
+            encoder.frames_in_flight = self.frames_in_flight
+        
+        if encoder.name != MoviePyEncoder.name:
+            if encoder.is_available():
+                try:
+                    encoder.encode(sources, output_file, progress, renditions)
+                    return encoder.assembly_seconds
+                except Exception as e:
+                    self.log_progress(f"   ⚠️ {encoder.name} encoder failed ({e}), falling back to moviepy")
+            else:
+                self.log_progress(f"   ⚠️ {encoder.name} encoder not available, falling back to moviepy")
+            encoder = MoviePyEncoder(self.encoder_settings)
+        
+        encoder.encode(sources, output_file, progress, renditions)
+        return encoder.assembly_seconds
+    
+    def split_scene_header(self, content: str) -> Tuple[Optional[Dict], str]:
+        """Pisahkan blok 'Judul:' / 'Subjudul:' di awal file dari body
+        
+        Return (header, body); header None jika file tidak diawali 'Judul:'.
+        """
+        blocks = content.split('\n\n', 1)
+        header_lines = blocks[0].strip().split('\n')
+        if not header_lines or header_lines[0].strip().lower() != 'judul:':
+            return None, content
+        
+        header = {'title': [], 'subtitle': []}
+        current = 'title'
+        for line in header_lines[1:]:
+            if line.strip().lower() == 'subjudul:':
+                current = 'subtitle'
+                continue
+            if line.strip():
+                header[current].append(line.strip())
+        
+        body = blocks[1].strip() if len(blocks) > 1 else ""
+        return {'title': '\n'.join(header['title']), 'subtitle': ' '.join(header['subtitle'])}, body
     
     def split_content(self, content: str) -> List[str]:
         """Split content into segments"""
@@ -700,15 +3612,11 @@ class VideoGenerator:
     def process_files(self):
         """Process all files in input folder"""
         try:
-            input_dir = self.input_folder.get() if hasattr(self, 'input_folder') else '.'
-            output_dir = self.output_folder.get() if hasattr(self, 'output_folder') else '.'
-            
-            # Create output directory
-            os.makedirs(output_dir, exist_ok=True)
+            input_dir = self.get_input_dir()
             
             # Find text files
             text_files = []
-            for file in os.listdir(input_dir):
+            for file in sorted(os.listdir(input_dir)):
                 if file.endswith('.txt'):
                     text_files.append(os.path.join(input_dir, file))
             
@@ -716,10 +3624,31 @@ class VideoGenerator:
                 self.log_progress("❌ No .txt files found in input folder")
                 return
             
-            self.log_progress(f"🎬 Found {len(text_files)} text files")
-            self.log_progress("🚀 Starting processing with advanced highlights...")
+            self.process_file_list(text_files)
             
-            successful = 0
+        except Exception as e:
+            self.log_progress(f"❌ Processing error: {str(e)}")
+        
+        finally:
+            if self.root:
+                # Widget hanya disentuh dari main thread (drain_progress)
+                self.progress.post('done')
+    
+    def process_file_list(self, text_files: List[str]) -> int:
+        """Process daftar file dan tampilkan summary; return jumlah yang sukses"""
+        output_dir = self.get_output_dir()
+        os.makedirs(output_dir, exist_ok=True)
+        
+        self.log_progress(f"🎬 Found {len(text_files)} text files")
+        self.log_progress("🚀 Starting processing with advanced highlights...")
+        
+        self.render_stats = {'frames_total': 0, 'frames_skipped': 0}
+        successful = 0
+        if self.batch_workers > 1 or self.file_timeout or self.file_retries:
+            # Batch mode: setiap file di process sendiri, dengan timeout dan retry
+            results = self.process_files_batch(text_files)
+            successful = sum(1 for result in results if result['success'])
+        else:
             for i, file_path in enumerate(text_files, 1):
                 self.log_progress(f"\n📹 {i}/{len(text_files)}: Processing...")
                 
@@ -729,18 +3658,144 @@ class VideoGenerator:
                 # Update progress
                 progress = (i / len(text_files)) * 100
                 self.log_progress(f"Progress: {progress:.1f}% ({i}/{len(text_files)})")
+        
+        self.log_progress(f"\n🎉 Processing completed!")
+        self.log_progress(f"✅ Successfully generated {successful}/{len(text_files)} videos")
+        self.log_progress(f"⏭️ Static frames skipped: {self.render_stats['frames_skipped']}/{self.render_stats['frames_total']}")
+        self.log_progress(f"📁 Output saved to: {output_dir}")
+        return successful
+    
+    def process_files_batch(self, text_files: List[str]) -> List[Dict]:
+        """Process beberapa file sekaligus dengan worker terbatas
+        
+        Hasil dikembalikan (dan diringkas) sesuai urutan text_files,
+        bukan urutan selesai.
+        """
+        options = self.get_job_options()
+        results = [None] * len(text_files)
+        completed = 0
+        
+        self.log_progress(f"⚡ Batch mode: {self.batch_workers} workers, "
+                          f"timeout {self.file_timeout or 'none'}, retries {self.file_retries}")
+        
+        with ThreadPoolExecutor(max_workers=max(1, self.batch_workers)) as pool:
+            futures = {
+                pool.submit(self._process_file_with_retries, file_path, options): index
+                for index, file_path in enumerate(text_files)
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                results[index] = future.result()
+                completed += 1
+                
+                progress = (completed / len(text_files)) * 100
+                self.log_progress(f"Progress: {progress:.1f}% ({completed}/{len(text_files)})")
+        
+        # Ordered summary
+        self.log_progress("\n📋 Batch summary:")
+        for file_path, result in zip(text_files, results):
+            name = os.path.basename(file_path)
+            if result['success']:
+                self.log_progress(f"   ✅ {name} ({result['attempts']} attempt(s), {result['elapsed']:.1f}s)")
+            else:
+                self.log_progress(f"   ❌ {name}: {result['error']} ({result['attempts']} attempt(s))")
+            self.render_stats['frames_total'] += result['frames_total']
+            self.render_stats['frames_skipped'] += result['frames_skipped']
+        
+        return results
+    
+    def _process_file_with_retries(self, file_path: str, options: Dict) -> Dict:
+        """Jalankan satu file di child process, ulangi jika gagal atau timeout"""
+        name = os.path.basename(file_path)
+        attempts = self.file_retries + 1
+        start_time = time.time()
+        
+        # Input yang tidak valid akan gagal di setiap percobaan - tidak di-retry
+        error = input_file_error(file_path)
+        if error is not None:
+            return {
+                'success': False,
+                'attempts': 0,
+                'elapsed': time.time() - start_time,
+                'error': error,
+                'frames_total': 0,
+                'frames_skipped': 0
+            }
+        
+        for attempt in range(1, attempts + 1):
+            result, error = self._process_file_attempt(file_path, options)
+            if result is not None and result['success']:
+                return {
+                    'success': True,
+                    'attempts': attempt,
+                    'elapsed': time.time() - start_time,
+                    'error': None,
+                    'frames_total': result['frames_total'],
+                    'frames_skipped': result['frames_skipped']
+                }
             
-            self.log_progress(f"\n🎉 Processing completed!")
-            self.log_progress(f"✅ Successfully generated {successful}/{len(text_files)} videos")
-            self.log_progress(f"📁 Output saved to: {output_dir}")
-            
-        except Exception as e:
-            self.log_progress(f"❌ Processing error: {str(e)}")
+            if attempt < attempts:
+                self.log_progress(f"   🔁 Retrying {name} ({error}) - attempt {attempt + 1}/{attempts}")
+        
+        return {
+            'success': False,
+            'attempts': attempts,
+            'elapsed': time.time() - start_time,
+            'error': error,
+            'frames_total': 0,
+            'frames_skipped': 0
+        }
+    
+    def _process_file_attempt(self, file_path: str, options: Dict) -> Tuple[Optional[Dict], Optional[str]]:
+        """Satu percobaan di child process; return (result, error)"""
+        name = os.path.basename(file_path)
+        context = multiprocessing.get_context("spawn")
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(target=_process_file_job, args=(file_path, options, sender))
+        process.start()
+        sender.close()
+        
+        deadline = time.time() + self.file_timeout if self.file_timeout else None
+        result = None
+        finished = False
         
+        try:
+            while True:
+                wait = 0.5
+                if deadline is not None:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        return None, f"timed out after {self.file_timeout}s"
+                    wait = min(wait, remaining)
+                
+                if receiver.poll(wait):
+                    try:
+                        kind, payload = receiver.recv()
+                    except EOFError:
+                        break
+                    if kind == 'log':
+                        self.log_progress(f"   [{name}] {payload}")
+                    elif kind == 'result':
+                        result = payload
+                elif not process.is_alive():
+                    break
+            
+            process.join()
+            finished = True
         finally:
-            if self.root:
-                self.processing = False
-                self.process_button.config(state="normal", text="🎬 Generate Videos with Highlights")
+            receiver.close()
+            if not finished:
+                # Timeout / interrupt: hentikan worker beserta ffmpeg dan pool worker-nya,
+                # lalu buang file .partial yang mungkin tertinggal
+                _terminate_process_group(process)
+                base_name = os.path.splitext(name)[0]
+                self.remove_partial_outputs(os.path.join(options['output_dir'], f"{base_name}_enhanced.mp4"))
+        
+        if result is None:
+            return None, f"worker exited with code {process.exitcode}"
+        if not result['success']:
+            return result, "render failed"
+        return result, None
     
     def run(self):
         """Run the application"""
@@ -749,8 +3804,273 @@ class VideoGenerator:
         else:
             print("🤖 GUI not available in this environment")
 
-def main():
+# Per-process generator untuk worker di process pool (dibuat sekali per worker)
+_WORKER_GENERATOR = None
+
+
+def _get_worker_generator() -> VideoGenerator:
+    global _WORKER_GENERATOR
+    if _WORKER_GENERATOR is None:
+        _WORKER_GENERATOR = VideoGenerator(headless=True)
+    return _WORKER_GENERATOR
+
+
+def _render_segment_job(job: Dict, generator: Optional[VideoGenerator] = None) -> Dict:
+    """Worker: render satu segment (atau separator) ke file video sendiri"""
+    if generator is None:
+        generator = _get_worker_generator()
+        generator.template_name = job['template']
+        generator.scene_enabled = job['scene']
+        generator.auto_fit = job.get('auto_fit', True)
+        generator.text_backend = job.get('text_backend', 'atlas')
+        generator.output_profiles = job.get('output_profiles')
+        generator.frame_store_dir = job.get('frame_store_dir')
+        generator.frame_store_budget_bytes = job.get('frame_store_budget_bytes', generator.frame_store_budget_bytes)
+    
+    layout_start = time.perf_counter()
+    store_key = None
+    if job['kind'] == 'separator':
+        source = generator.create_separator_source(job['duration'])
+    elif job['kind'] == 'title':
+        # Dengan frame store: frame ditulis ke disk lalu di-encode dari memmap
+        source, store_key = generator.stored_source(
+            job, lambda: generator.create_title_source(job['header'], job['duration']))
+    else:
+        source, store_key = generator.stored_source(
+            job, lambda: generator.create_segment_source(job['text'], job['duration'], job['y_position']))
+    # Render yang sudah terjadi sebelum encode (frame store) bukan bagian layout/encode
+    rendered_before = source.render_seconds
+    layout_seconds = time.perf_counter() - layout_start - rendered_before
+    
+    encode_start = time.perf_counter()
+    encoder = FFmpegPipeEncoder(EncoderSettings(**job['encoder_settings']),
+                                frames_in_flight=job.get('frames_in_flight', 0))
+    encoder.encode([source], job['output_file'])
+    encode_seconds = time.perf_counter() - encode_start
+    
+    return {
+        'output_file': job['output_file'],
+        'store_key': store_key,
+        'frames_total': source.total_frames,
+        'frames_skipped': source.frames_skipped,
+        'layout_sec': layout_seconds,
+        'render_sec': source.render_seconds,
+        'encode_sec': max(0.0, encode_seconds - (source.render_seconds - rendered_before))
+    }
+
+
+def input_file_error(file_path: str) -> Optional[str]:
+    """Alasan input tidak bisa diproses (tidak ada, bukan UTF-8, kosong), None jika valid"""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read().strip()
+    except OSError as e:
+        return f"cannot read input ({e.strerror or e})"
+    except UnicodeDecodeError:
+        return "input is not valid UTF-8"
+    if not content:
+        return "empty input file"
+    return None
+
+
+def _terminate_process_group(process, grace: float = 2.0):
+    """Stop worker file beserta semua child-nya (ffmpeg, segment pool)
+    
+    Di POSIX worker menjadi leader process group sendiri, jadi satu killpg
+    menjangkau cucu yang tidak akan mati hanya karena parent-nya mati.
+    """
+    if hasattr(os, 'killpg'):
+        try:
+            same_group = os.getpgid(process.pid) == process.pid
+        except ProcessLookupError:
+            same_group = False
+        if same_group:
+            try:
+                os.killpg(process.pid, signal.SIGTERM)
+                process.join(grace)
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            process.join()
+            return
+    if process.is_alive():
+        process.terminate()
+        process.join(grace)
+        if process.is_alive():
+            process.kill()
+    process.join()
+
+
+def _process_file_job(file_path: str, options: Dict, conn) -> None:
+    """Worker: process satu file, log dan hasil dikirim lewat pipe"""
+    if hasattr(os, 'setpgrp'):
+        # Process group sendiri: timeout di parent bisa menghentikan ffmpeg + pool sekaligus
+        os.setpgrp()
+    try:
+        generator = VideoGenerator(headless=True)
+        generator.apply_job_options(options)
+        generator.log_progress = lambda message: conn.send(('log', message))
+        
+        success = generator.process_text_file(file_path)
+        conn.send(('result', {
+            'success': success,
+            'frames_total': generator.render_stats['frames_total'],
+            'frames_skipped': generator.render_stats['frames_skipped']
+        }))
+    finally:
+        conn.close()
+
+
+def collect_text_files(inputs: List[str]) -> List[str]:
+    """Expand argumen CLI (file atau folder) menjadi daftar file .txt"""
+    text_files = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for file in sorted(os.listdir(path)):
+                if file.endswith('.txt'):
+                    text_files.append(os.path.join(path, file))
+        else:
+            text_files.append(path)
+    return text_files
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    """CLI: tanpa subcommand = perilaku lama (GUI / CI test)"""
+    parser = argparse.ArgumentParser(description="Enhanced Video Generator with Advanced Highlights")
+    subparsers = parser.add_subparsers(dest="command")
+    
+    render_parser = subparsers.add_parser("render", help="Render text files headless (tanpa tkinter)")
+    render_parser.add_argument("inputs", nargs="+", help="File .txt atau folder berisi file .txt")
+    render_parser.add_argument("-o", "--output", default=".", help="Output folder (default: .)")
+    render_parser.add_argument("--template", choices=sorted(default_templates()), default="default",
+                               help="Template name (publish = 720p + 1080p + square)")
+    render_parser.add_argument("--outputs", nargs="+", choices=sorted(OUTPUT_PROFILES), default=None,
+                               help="Rendition output (default: outputs dari template)")
+    render_parser.add_argument("--encoder", choices=sorted(ENCODER_BACKENDS), default="ffmpeg",
+                               help="Encoder backend (fallback ke moviepy)")
+    render_parser.add_argument("--preset", default="medium", help="x264 preset")
+    render_parser.add_argument("--crf", type=int, default=23, help="x264 CRF")
+    render_parser.add_argument("--threads", type=int, default=0, help="Encoder threads (0 = auto)")
+    render_parser.add_argument("--pix-fmt", default="yuv420p", help="Output pixel format")
+    render_parser.add_argument("--frames-in-flight", type=int, default=None,
+                               help="Frame di antrean render->encode (0 = tanpa pipeline, default 8 jika multi-core)")
+    render_parser.add_argument("--text-backend", choices=TEXT_BACKENDS, default="atlas",
+                               help="Rasterizer text layer (atlas = glyph cache NumPy, pillow = ImageDraw)")
+    render_parser.add_argument("--segment-workers", type=int, default=1,
+                               help="Render segment paralel per file")
+    render_parser.add_argument("--cache-dir", default=None,
+                               help="Cache segment ter-encode (re-render hanya segment yang berubah)")
+    render_parser.add_argument("--cache-max-mb", type=int, default=2048, help="Batas ukuran cache (MB)")
+    render_parser.add_argument("--frame-store", default=None,
+                               help="Render frame ke disk dulu, encode dari memmap; segment yang selesai "
+                                    "disimpan sampai job sukses (job yang crash resume)")
+    render_parser.add_argument("--frame-store-budget-mb", type=int, default=256,
+                               help="Batas memori mapping frame store (MB)")
+    render_parser.add_argument("--no-auto-fit", action="store_true",
+                               help="Font content tetap (tanpa auto-fit dan pagination)")
+    render_parser.add_argument("--no-scene", action="store_true",
+                               help="Layout polos: tanpa overlay PNG dan title card Judul/Subjudul")
+    render_parser.add_argument("--metrics-file", default=None,
+                               help="Tulis metrics per job/segment sebagai JSON lines")
+    render_parser.add_argument("--profile-dir", default=None,
+                               help="Simpan cProfile (.prof) per job ke folder ini")
+    render_parser.add_argument("--progress-interval", type=float, default=2.0,
+                               help="Interval baris progress/ETA di console (detik, 0 = nonaktif)")
+    render_parser.add_argument("--workers", type=int, default=1, help="Jumlah file paralel (batch mode)")
+    render_parser.add_argument("--timeout", type=float, default=None, help="Timeout per file (detik)")
+    render_parser.add_argument("--retries", type=int, default=0, help="Retry per file")
+    
+    preview_parser = subparsers.add_parser("preview", help="Draft preview cepat (video kecil atau contact sheet)")
+    preview_parser.add_argument("inputs", nargs="+", help="File .txt atau folder berisi file .txt")
+    preview_parser.add_argument("-o", "--output", default=".", help="Output folder (default: .)")
+    preview_parser.add_argument("--template", choices=sorted(default_templates()), default="default",
+                                help="Template name")
+    preview_parser.add_argument("--sheet", action="store_true", help="Contact sheet PNG key frame, bukan video")
+    preview_parser.add_argument("--scale", type=float, default=0.5, help="Skala output (default 0.5)")
+    preview_parser.add_argument("--fps", type=int, default=10, help="Frame rate preview (default 10)")
+    preview_parser.add_argument("--no-scene", action="store_true",
+                                help="Layout polos: tanpa overlay PNG dan title card Judul/Subjudul")
+    
+    subparsers.add_parser("test", help="Run headless functionality test")
+    subparsers.add_parser("gui", help="Start the Tk GUI")
+    return parser
+
+
+def render_command(args: argparse.Namespace) -> int:
+    """Headless render - tidak pernah membuat Tk, return exit code"""
+    text_files = collect_text_files(args.inputs)
+    if not text_files:
+        print("❌ No .txt files found")
+        return 1
+    
+    generator = VideoGenerator(headless=True)
+    generator.template_name = args.template
+    generator.output_dir = args.output
+    generator.encoder_backend = args.encoder
+    generator.encoder_settings = EncoderSettings(
+        preset=args.preset,
+        crf=args.crf,
+        threads=args.threads,
+        pixel_format=args.pix_fmt,
+        fps=generator.templates[args.template]["fps"]
+    )
+    if args.frames_in_flight is not None:
+        generator.frames_in_flight = args.frames_in_flight
+    generator.text_backend = args.text_backend
+    generator.output_profiles = args.outputs
+    generator.segment_workers = args.segment_workers
+    generator.segment_cache_dir = args.cache_dir
+    generator.segment_cache_max_bytes = args.cache_max_mb * 1024 * 1024
+    generator.frame_store_dir = args.frame_store
+    generator.frame_store_budget_bytes = args.frame_store_budget_mb * 1024 * 1024
+    generator.scene_enabled = not args.no_scene
+    generator.auto_fit = not args.no_auto_fit
+    generator.metrics_file = args.metrics_file
+    generator.profile_dir = args.profile_dir
+    generator.batch_workers = args.workers
+    generator.file_timeout = args.timeout
+    generator.file_retries = args.retries
+    
+    stop_console = None
+    if args.progress_interval > 0:
+        stop_console = generator.progress.start_console(args.progress_interval)
+    try:
+        successful = generator.process_file_list(text_files)
+    finally:
+        if stop_console is not None:
+            stop_console.set()
+    return 0 if successful == len(text_files) else 1
+
+
+def preview_command(args: argparse.Namespace) -> int:
+    """Draft preview headless, return exit code"""
+    text_files = collect_text_files(args.inputs)
+    if not text_files:
+        print("❌ No .txt files found")
+        return 1
+    
+    generator = VideoGenerator(headless=True)
+    generator.template_name = args.template
+    generator.output_dir = args.output
+    generator.scene_enabled = not args.no_scene
+    os.makedirs(args.output, exist_ok=True)
+    
+    results = [generator.preview_text_file(file_path, args.sheet, args.scale, args.fps)
+               for file_path in text_files]
+    return 0 if all(results) else 1
+
+
+def main(argv: Optional[List[str]] = None):
     """Main function"""
+    args = build_arg_parser().parse_args(argv)
+    
+    if args.command == "render":
+        sys.exit(render_command(args))
+    if args.command == "preview":
+        sys.exit(preview_command(args))
+    if args.command == "test":
+        sys.exit(0 if run_headless_test() else 1)
+    
     print("🎬 Enhanced Video Generator with Advanced Highlights")
     print("=" * 50)
     print("Features:")
@@ -763,8 +4083,7 @@ def main():
     print("=" * 50)
     
     # Check if running in headless environment
-    import os
-    if os.environ.get('GITHUB_ACTIONS') or os.environ.get('CI'):
+    if args.command != "gui" and (os.environ.get('GITHUB_ACTIONS') or os.environ.get('CI')):
         print("🤖 GitHub Actions/CI environment detected")
         run_headless_test()
         return